@@ -0,0 +1,69 @@
+import math
+import threading
+import time
+from typing import Dict
+
+from metrics import ADMISSION_REJECTIONS
+from rate_limit import TokenBucket
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TenantLimiter:
+    """Per-tenant (API key) cap on in-flight requests plus a requests-per-minute quota.
+
+    Admission never waits: a tenant over either limit is rejected at once with a retry hint.
+    A limit of 0 disables that check. Limits are per process, so divide by the worker count.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: float, max_tenants: int = 1024) -> None:
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self.max_tenants = max_tenants
+        self._active: Dict[str, int] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, tenant: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tenants:
+                self._prune(now)
+            bucket = self._buckets[tenant] = TokenBucket(self.requests_per_minute / 60, self.requests_per_minute)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        """Forget idle tenants whose bucket has refilled; recreating them later is equivalent."""
+        for tenant, bucket in list(self._buckets.items()):
+            if not self._active.get(tenant) and bucket.wait_time(bucket.capacity, now) == 0:
+                del self._buckets[tenant]
+
+    def acquire(self, tenant: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.max_concurrent > 0 and self._active.get(tenant, 0) >= self.max_concurrent:
+                ADMISSION_REJECTIONS.labels("concurrency").inc()
+                raise QuotaExceeded(f"{self.max_concurrent} requests already in flight for this API key", 1.0)
+            if self.requests_per_minute > 0:
+                bucket = self._bucket(tenant, now)
+                wait = bucket.wait_time(1, now)
+                if wait > 0:
+                    ADMISSION_REJECTIONS.labels("rate").inc()
+                    raise QuotaExceeded(f"Over {self.requests_per_minute:g} requests per minute for this API key", wait)
+                bucket.take(1)
+            self._active[tenant] = self._active.get(tenant, 0) + 1
+
+    def release(self, tenant: str) -> None:
+        with self._lock:
+            remaining = self._active.get(tenant, 0) - 1
+            if remaining > 0:
+                self._active[tenant] = remaining
+            else:
+                self._active.pop(tenant, None)
@@ -1,197 +1,138 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
-
-import requests
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+import threading
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, AsyncIterator, Iterator, Literal, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from openai import OpenAI
-
-
-load_dotenv()
+from starlette.background import BackgroundTask
+
+from admission import QuotaExceeded, TenantLimiter
+from cache import MemoryBackend, SqliteBackend
+from job_queue import JobQueue, QueueFullError
+from metrics import Timings, render, timed
+from pipeline import (
+    CrawlOptions,
+    PipelineError,
+    crawl,
+    inflight,
+    iter_crawl,
+    job_store,
+    llm_cache,
+    missing_credentials,
+    recommend,
+    recommend_many,
+    scrape_cache,
+    warm_up,
+)
+from rate_limit import flow, run_in_flow, weighted
+
+
+APPLY_JOB_WORKERS = int(os.getenv("APPLY_JOB_WORKERS", "4"))
+APPLY_JOB_MAX_PENDING = int(os.getenv("APPLY_JOB_MAX_PENDING", "64"))
+APPLY_JOB_RESULT_TTL = float(os.getenv("APPLY_JOB_RESULT_TTL", "3600"))
+APPLY_JOB_STORE_PATH = os.getenv("APPLY_JOB_STORE_PATH") or None
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "50"))
+API_KEY_HEADER = os.getenv("API_KEY_HEADER", "X-API-Key")
+# Comma-separated "key" or "key:batch" entries. When set, every /apply call needs one of these keys
+# and quotas are charged per key; when unset the API is open, unmetered and served as interactive.
+# Client addresses are never used as tenants, since behind a proxy every caller shares one.
+API_KEYS = os.getenv("API_KEYS", "")
+TENANT_MAX_CONCURRENT = int(os.getenv("TENANT_MAX_CONCURRENT", "4"))
+TENANT_REQUESTS_PER_MINUTE = float(os.getenv("TENANT_REQUESTS_PER_MINUTE", "60"))
+PRIORITY_WEIGHTS = {
+    "interactive": float(os.getenv("INTERACTIVE_WEIGHT", "4")),
+    "batch": float(os.getenv("BATCH_WEIGHT", "1")),
+}
+
+apply_jobs = JobQueue(
+    APPLY_JOB_WORKERS,
+    APPLY_JOB_MAX_PENDING,
+    APPLY_JOB_RESULT_TTL,
+    SqliteBackend(APPLY_JOB_STORE_PATH) if APPLY_JOB_STORE_PATH else MemoryBackend(APPLY_JOB_MAX_PENDING * 16),
+)
+tenants = TenantLimiter(TENANT_MAX_CONCURRENT, TENANT_REQUESTS_PER_MINUTE)
+
+
+def _parse_api_keys(value: str) -> Dict[str, str]:
+    keys: Dict[str, str] = {}
+    for entry in value.split(","):
+        key, _, priority = (part.strip() for part in entry.partition(":"))
+        if not key:
+            continue
+        priority = priority or "interactive"
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"API_KEYS: unknown priority class {priority!r}")
+        keys[key] = priority
+    return keys
+
+
+api_keys = _parse_api_keys(API_KEYS)
+
+
+class ApplyRequest(CrawlOptions):
+    resume: str
 
-DEFAULT_JOBS_URL = "https://www.google.com/about/careers/applications/jobs/results"
 
-firecrawl_api_key = os.getenv("FIRECRAWL_API_KEY")
-if not firecrawl_api_key:
-    raise RuntimeError("FIRECRAWL_API_KEY is not set")
+class ApplyBatchRequest(CrawlOptions):
+    resumes: List[str] = Field(min_length=1, max_length=BATCH_MAX_RESUMES)
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise RuntimeError("OPENAI_API_KEY is not set")
 
-client = OpenAI(api_key=openai_api_key)
+class ApplyResponse(BaseModel):
+    apply_links: List[str]
+    extracted_data: List[Dict[str, Any]]
+    recommended_jobs: List[Dict[str, Any]]
+    timings: Optional[Dict[str, Dict[str, float]]] = None
 
 
-class ApplyRequest(BaseModel):
-    resume: str
-    jobs_page_url: Optional[str] = None
-    max_jobs: int = Field(default=30, ge=1, le=100)
+class BatchRecommendation(BaseModel):
+    resume_index: int
+    recommended_jobs: List[Dict[str, Any]]
+    error: Optional[str] = None
 
 
-class ApplyResponse(BaseModel):
+class ApplyBatchResponse(BaseModel):
     apply_links: List[str]
     extracted_data: List[Dict[str, Any]]
-    recommended_jobs: List[Dict[str, Any]]
+    results: List[BatchRecommendation]
+    timings: Optional[Dict[str, Dict[str, float]]] = None
 
 
-app = FastAPI(title="Job Hunt Agent API")
+class ApplyJob(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ApplyResponse] = None
+    error: Optional[str] = None
 
 
-def _parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+def _warm_up() -> None:
     try:
-        return json.loads(text)
-    except Exception:
+        warm_up()
+    except RuntimeError:
         pass
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        try:
-            return json.loads(text[start : end + 1])
-        except Exception:
-            return None
-    return None
 
 
-def _parse_json_array(text: str) -> Optional[List[Any]]:
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-    start = text.find("[")
-    end = text.rfind("]")
-    if start != -1 and end != -1 and end > start:
-        try:
-            return json.loads(text[start : end + 1])
-        except Exception:
-            return None
-    return None
-
-
-def _scrape_markdown(url: str) -> str:
-    response = requests.post(
-        "https://api.firecrawl.dev/v1/scrape",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {firecrawl_api_key}",
-        },
-        json={"url": url, "formats": ["markdown"]},
-        timeout=60,
-    )
-    if response.status_code != 200:
-        raise HTTPException(status_code=502, detail=f"Firecrawl error {response.status_code}: {response.text}")
-    payload = response.json()
-    if not payload.get("success"):
-        raise HTTPException(status_code=502, detail=payload.get("message", "Firecrawl scrape failed"))
-    return payload["data"]["markdown"]
-
-
-def _extract_apply_links(markdown: str, max_jobs: int) -> List[str]:
-    prompt = f"""
-    Extract up to {max_jobs} job application links from the given markdown content.
-    Return the result as a JSON object with a single key 'apply_links' containing an array of strings (the links).
-    The output should be a valid JSON object, with no additional text.
-    Do not include any JSON markdown formatting or code block indicators.
-    Provide only the raw JSON object as the response.
-
-    Example of the expected format:
-    {{"apply_links": ["https://example.com/job1", "https://example.com/job2", ...]}}
-
-    Markdown content:
-    {markdown[:100000]}
-    """
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    content = (completion.choices[0].message.content or "").strip()
-    obj = _parse_json_object(content)
-    if not obj or "apply_links" not in obj or not isinstance(obj["apply_links"], list):
-        raise HTTPException(status_code=502, detail="Failed to extract apply links from model output")
-    links = [link for link in obj["apply_links"] if isinstance(link, str)]
-    return links[:max_jobs]
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Build upstream clients off the startup path so the worker starts accepting connections at once.
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
 
 
-def _scrape_job_details(link: str) -> Optional[Dict[str, Any]]:
-    try:
-        response = requests.post(
-            "https://api.firecrawl.dev/v1/scrape",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {firecrawl_api_key}",
-            },
-            json={
-                "url": link,
-                "formats": ["extract"],
-                "actions": [{"type": "click", "selector": "#job-overview"}],
-                "extract": {
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "job_title": {"type": "string"},
-                            "sub_division_of_organization": {"type": "string"},
-                            "key_skills": {"type": "array", "items": {"type": "string"}},
-                            "compensation": {"type": "string"},
-                            "location": {"type": "string"},
-                            "apply_link": {"type": "string"},
-                        },
-                        "required": [
-                            "job_title",
-                            "sub_division_of_organization",
-                            "key_skills",
-                            "compensation",
-                            "location",
-                            "apply_link",
-                        ],
-                    }
-                },
-            },
-            timeout=120,
-        )
-        if response.status_code != 200:
-            return None
-        payload = response.json()
-        if not payload.get("success"):
-            return None
-        return payload["data"]["extract"]
-    except Exception:
-        return None
-
-
-def _recommend_jobs(resume: str, extracted_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    prompt = f"""
-    Please analyze the resume and job listings, and return a JSON list of the top 3 roles that best fit the candidate's experience and skills. Include only the job title, compensation, and apply link for each recommended role. The output should be a valid JSON array of objects in the following format, with no additional text:
-
-    [
-      {{
-        "job_title": "Job Title",
-        "compensation": "Compensation (if available, otherwise empty string)",
-        "apply_link": "Application URL"
-      }},
-      ...
-    ]
-
-    Based on the following resume:
-    {resume}
-
-    And the following job listings:
-    {json.dumps(extracted_data, indent=2)}
-    """
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "user",
-                "content": prompt,
-            }
-        ],
-    )
-    raw = (completion.choices[0].message.content or "").strip()
-    arr = _parse_json_array(raw)
-    if not isinstance(arr, list):
-        return []
-    return [item for item in arr if isinstance(item, dict)]
+app = FastAPI(title="Job Hunt Agent API", lifespan=_lifespan)
+
+
+@app.exception_handler(PipelineError)
+async def _pipeline_error(request: Request, exc: PipelineError) -> Response:
+    return await http_exception_handler(request, HTTPException(exc.status_code, exc.detail, exc.headers))
 
 
 @app.get("/health")
@@ -199,30 +140,207 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/apply", response_model=ApplyResponse)
-def apply(request: ApplyRequest) -> ApplyResponse:
-    jobs_page_url = request.jobs_page_url or DEFAULT_JOBS_URL
-    markdown = _scrape_markdown(jobs_page_url)
-    apply_links = _extract_apply_links(markdown, request.max_jobs)
+@app.get("/ready")
+def ready() -> Dict[str, str]:
+    missing = missing_credentials()
+    if missing:
+        raise HTTPException(status_code=503, detail=f"Missing credentials: {', '.join(missing)}")
+    warm_up()
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/jobs")
+def search_jobs(
+    location: Optional[str] = None, skill: Optional[str] = None, limit: int = Query(default=50, ge=1, le=500)
+) -> List[Dict[str, Any]]:
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="Job store is not enabled (set JOB_STORE_PATH)")
+    return job_store.search(location=location, skill=skill, limit=limit)
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    return {**scrape_cache.stats(), "llm": llm_cache.stats(), "coalesced": inflight.stats()}
 
-    extracted_data: List[Dict[str, Any]] = []
-    for link in apply_links:
-        details = _scrape_job_details(link)
-        if details:
-            extracted_data.append(details)
 
-    recommended_jobs = _recommend_jobs(request.resume, extracted_data)
+def _admit(http_request: Request) -> Tuple[Optional[str], str]:
+    """Return (tenant, priority class) for the caller's API key after reserving one of its slots.
+
+    Fails fast with 401 for a missing or unknown key and 429 over quota. Without API_KEYS there
+    is no tenant to charge and every caller is interactive.
+    """
+    if not api_keys:
+        return None, "interactive"
+    tenant = http_request.headers.get(API_KEY_HEADER, "")
+    priority = api_keys.get(tenant)
+    if priority is None:
+        raise HTTPException(status_code=401, detail=f"Missing or unknown {API_KEY_HEADER} header")
+    try:
+        tenants.acquire(tenant)
+    except QuotaExceeded as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": exc.retry_after_header()})
+    return tenant, priority
+
+
+def _release(tenant: Optional[str]) -> None:
+    if tenant is not None:
+        tenants.release(tenant)
+
+
+def _apply_events(request: ApplyRequest, priority: str) -> Iterator[Dict[str, Any]]:
+    flow_id = uuid.uuid4().hex
+    with weighted(flow_id, PRIORITY_WEIGHTS[priority]):
+        yield from _flow_events(request, flow_id)
+
+
+def _flow_events(request: ApplyRequest, flow_id: str) -> Iterator[Dict[str, Any]]:
+    # Each resumption of a streaming generator may run in a fresh context, so the flow is
+    # entered around every stage rather than once for the whole generator. Headers are already
+    # sent by the time anything fails, so every failure ends the stream with an error event.
+    timings = Timings()
+    completed: List[Tuple[int, Dict[str, Any]]] = []
+    try:
+        for kind, payload in iter_crawl(request, timings, flow_id):
+            if kind == "links":
+                yield {"event": "apply_links", "apply_links": payload}
+            else:
+                completed.append(payload)
+                yield {"event": "extracted_data", "index": payload[0], "data": payload[1]}
+
+        extracted_data = [details for _, details in sorted(completed, key=lambda item: item[0])]
+        recommended_jobs = run_in_flow(flow_id, recommend, request.resume, request, extracted_data, timings)
+    except PipelineError as exc:
+        yield {"event": "error", "status_code": exc.status_code, "detail": exc.detail}
+        return
+    except Exception as exc:
+        yield {"event": "error", "status_code": 500, "detail": str(exc) or type(exc).__name__}
+        return
+    yield {"event": "recommended_jobs", "recommended_jobs": recommended_jobs}
+    if request.include_timings:
+        yield {"event": "timings", "timings": timings.summary()}
+
+
+def _ndjson(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for event in events:
+        yield json.dumps(event) + "\n"
+
+
+def _server_sent_events(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _run_apply(request: ApplyRequest, priority: str) -> ApplyResponse:
+    timings = Timings()
+    flow_id = uuid.uuid4().hex
+    with flow(flow_id), weighted(flow_id, PRIORITY_WEIGHTS[priority]), timed("total", timings):
+        apply_links, extracted_data = crawl(request, timings)
+        recommended_jobs = recommend(request.resume, request, extracted_data, timings)
 
     return ApplyResponse(
         apply_links=apply_links,
         extracted_data=extracted_data,
         recommended_jobs=recommended_jobs,
+        timings=timings.summary() if request.include_timings else None,
     )
 
 
+@app.post("/apply", response_model=ApplyResponse)
+def apply(request: ApplyRequest, http_request: Request) -> ApplyResponse:
+    tenant, priority = _admit(http_request)
+    try:
+        return _run_apply(request, priority)
+    finally:
+        _release(tenant)
+
+
+@app.post("/apply/batch", response_model=ApplyBatchResponse)
+def apply_batch(request: ApplyBatchRequest, http_request: Request) -> ApplyBatchResponse:
+    tenant, _ = _admit(http_request)
+    timings = Timings()
+    flow_id = uuid.uuid4().hex
+    try:
+        with flow(flow_id), weighted(flow_id, PRIORITY_WEIGHTS["batch"]), timed("total", timings):
+            apply_links, extracted_data = crawl(request, timings)
+            results = recommend_many(request.resumes, request, extracted_data, timings)
+    finally:
+        _release(tenant)
+    return ApplyBatchResponse(
+        apply_links=apply_links,
+        extracted_data=extracted_data,
+        results=results,
+        timings=timings.summary() if request.include_timings else None,
+    )
+
+
+@app.post("/apply/stream")
+def apply_stream(request: ApplyRequest, http_request: Request) -> StreamingResponse:
+    tenant, priority = _admit(http_request)
+    events = _apply_events(request, priority)
+    # The background task releases the slot once the stream completes. If the client goes away
+    # first, possibly before the generator ever started, the slot is released when the generator
+    # is collected instead. finalize runs at most once either way.
+    release = BackgroundTask(weakref.finalize(events, _release, tenant))
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        return StreamingResponse(_server_sent_events(events), media_type="text/event-stream", background=release)
+    return StreamingResponse(_ndjson(events), media_type="application/x-ndjson", background=release)
+
+
+@app.post("/apply/jobs", response_model=ApplyJob, status_code=202)
+def submit_apply_job(request: ApplyRequest, http_request: Request) -> ApplyJob:
+    # Queued jobs are background work: they run at batch weight and hold the caller's slot until done.
+    tenant, _ = _admit(http_request)
+
+    def run() -> Dict[str, Any]:
+        try:
+            return _run_apply(request, "batch").model_dump()
+        finally:
+            _release(tenant)
+
+    try:
+        record = apply_jobs.submit(run)
+    except QueueFullError as exc:
+        _release(tenant)
+        raise HTTPException(status_code=503, detail=f"Apply queue is full: {exc}", headers={"Retry-After": "30"})
+    return ApplyJob(**record)
+
+
+@app.get("/apply/jobs/{job_id}", response_model=ApplyJob)
+def get_apply_job(job_id: str) -> ApplyJob:
+    record = apply_jobs.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return ApplyJob(**record)
+
+
 if __name__ == "__main__":
+    import argparse
+    import tempfile
+
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the Job Hunt Agent API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    # Without a shared job store, a single worker is the only layout where job polls always resolve.
+    default_workers = (os.cpu_count() or 1) if APPLY_JOB_STORE_PATH else 1
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY") or default_workers))
+    parser.add_argument("--reload", action="store_true", help="single auto-reloading process for development")
+    args = parser.parse_args()
+    if args.workers > 1 and not APPLY_JOB_STORE_PATH:
+        parser.error("--workers > 1 needs APPLY_JOB_STORE_PATH so every worker can answer /apply/jobs polls")
+
+    if args.reload:
+        uvicorn.run("app:app", host=args.host, port=args.port, reload=True)
+    else:
+        if args.workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+        uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers)
 
 
@@ -0,0 +1,301 @@
+"""Offline load test for the /apply API.
+
+Starts local stand-ins for Firecrawl's /v1/scrape and OpenAI's chat completions, boots app.py
+against them, drives /apply with concurrent clients and reports latency percentiles, throughput
+and upstream calls per request. No real API credits are spent.
+
+    python benchmark.py --requests 200 --concurrency 20 --latency 0.2 --error-rate 0.02
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+JOB_URL = "https://www.google.com/about/careers/applications/jobs/results/{id}-benchmark-role"
+PROMPT_EXAMPLE_LINKS = {"https://example.com/job1", "https://example.com/job2"}
+
+
+class StubConfig:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.latency = args.latency
+        self.jitter = args.jitter
+        self.error_rate = args.error_rate
+        self.listing_jobs = args.listing_jobs
+        self.payload_bytes = args.payload_bytes
+        self.llm_links = args.llm_links
+        self.calls: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.calls)
+
+
+def _stub_handler(config: StubConfig) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(max(0.0, random.gauss(config.latency, config.jitter)))
+            if self.path.endswith("/v1/scrape"):
+                kind = "scrape_listing" if "markdown" in body.get("formats", []) else "scrape_detail"
+                config.count(kind)
+                if random.random() < config.error_rate:
+                    self._send(random.choice([429, 500, 503]), {"success": False, "error": "stub failure"})
+                elif kind == "scrape_listing":
+                    self._send(200, {"success": True, "data": {"markdown": _listing_markdown(config)}})
+                else:
+                    self._send(200, {"success": True, "data": {"extract": _job_extract(body["url"])}})
+            elif self.path.endswith("/chat/completions"):
+                config.count("chat_completion")
+                if random.random() < config.error_rate:
+                    self._send(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                else:
+                    self._send(200, _chat_completion(body))
+            else:
+                self._send(404, {"error": "not found"})
+
+    return Handler
+
+
+def _listing_markdown(config: StubConfig) -> str:
+    url = "https://example.com/jobs/{id}" if config.llm_links else JOB_URL
+    lines = [f"- [Role {i}]({url.format(id=100000 + i)})" for i in range(config.listing_jobs)]
+    padding = max(0, config.payload_bytes - sum(len(line) + 1 for line in lines))
+    return "\n".join(lines) + "\n" + ("lorem ipsum " * (padding // 12 + 1))[:padding]
+
+
+def _job_extract(url: str) -> Dict[str, Any]:
+    job_id = re.sub(r"\D", "", url)[-6:] or "0"
+    return {
+        "job_title": f"Product Designer {job_id}",
+        "sub_division_of_organization": random.choice(["Cloud", "Ads", "Devices", "Search"]),
+        "key_skills": random.sample(["figma", "user research", "prototyping", "python", "design systems"], 3),
+        "compensation": "$150,000-$200,000",
+        "location": "Seattle, WA",
+        "apply_link": url,
+    }
+
+
+def _chat_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for message in body.get("messages", [])
+        for part in ([message["content"]] if isinstance(message["content"], str) else message["content"])
+    )
+    if "apply_links" in prompt:
+        match = re.search(r"up to (\d+)", prompt)
+        limit = int(match.group(1)) if match else 10
+        links = list(dict.fromkeys(re.findall(r"https?://[^\s)\]\"]+", prompt)))
+        links = [link for link in links if link not in PROMPT_EXAMPLE_LINKS][:limit]
+        content = json.dumps({"apply_links": links})
+    else:
+        links = list(dict.fromkeys(re.findall(r"\"apply_link\":\s*\"([^\"]+)\"", prompt)))
+        jobs = [{"job_title": "Product Designer", "compensation": "", "apply_link": link} for link in links[:3]]
+        content = json.dumps({"recommended_jobs": jobs})
+    prompt_tokens = len(prompt) // 4
+    return {
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [
+            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_app(port: int, stub_url: str, extra_env: Dict[str, str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        {
+            "FIRECRAWL_API_KEY": "benchmark",
+            "OPENAI_API_KEY": "benchmark",
+            "FIRECRAWL_API_URL": stub_url,
+            "OPENAI_BASE_URL": f"{stub_url}/v1",
+            "SCRAPE_CACHE_LISTING_TTL": "0",
+            "SCRAPE_CACHE_DETAIL_TTL": "0",
+            "LLM_CACHE_TTL": "0",
+            "TENANT_MAX_CONCURRENT": "0",
+            "TENANT_REQUESTS_PER_MINUTE": "0",
+        }
+    )
+    env.update(extra_env)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("app.py did not become healthy within 30s")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    config = StubConfig(args)
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), _stub_handler(config))
+    stub.daemon_threads = True
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    if args.cache:
+        extra_env.setdefault("SCRAPE_CACHE_LISTING_TTL", "900")
+        extra_env.setdefault("SCRAPE_CACHE_DETAIL_TTL", "21600")
+        extra_env.setdefault("LLM_CACHE_TTL", "86400")
+    port = _free_port()
+    app_process = _start_app(port, stub_url, extra_env)
+
+    payload = {
+        "resume": "Product designer with figma, user research, prototyping and design systems experience.",
+        "max_jobs": args.max_jobs,
+        "recommend_mode": args.recommend_mode,
+    }
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one_request(client: httpx.Client) -> None:
+        started = time.perf_counter()
+        try:
+            status = str(client.post(f"http://127.0.0.1:{port}{args.endpoint}", json=payload).status_code)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    try:
+        with httpx.Client(timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            for _ in range(args.warmup):
+                one_request(client)
+            latencies.clear()
+            statuses.clear()
+            calls_before = config.snapshot()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                for _ in range(args.requests):
+                    executor.submit(one_request, client)
+            wall = time.perf_counter() - started
+    finally:
+        app_process.terminate()
+        app_process.wait(timeout=10)
+        stub.shutdown()
+
+    calls = {name: count - calls_before.get(name, 0) for name, count in config.snapshot().items()}
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "statuses": statuses,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(args.requests / wall, 2) if wall else 0.0,
+        "latency_seconds": {
+            "p50": round(_percentile(latencies, 50), 4),
+            "p95": round(_percentile(latencies, 95), 4),
+            "p99": round(_percentile(latencies, 99), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        "upstream_calls": calls,
+        "upstream_calls_per_request": {
+            name: round(count / args.requests, 3) for name, count in sorted(calls.items())
+        },
+    }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark /apply against local Firecrawl and OpenAI stubs")
+    parser.add_argument("--requests", type=int, default=50, help="measured requests to send")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent client connections")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests sent first")
+    parser.add_argument("--endpoint", default="/apply", help="API path to POST to")
+    parser.add_argument("--max-jobs", type=int, default=10, help="max_jobs sent with each request")
+    parser.add_argument("--recommend-mode", choices=["llm", "local", "map_reduce"], default="llm")
+    parser.add_argument("--latency", type=float, default=0.1, help="mean stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="stub latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls that fail")
+    parser.add_argument("--listing-jobs", type=int, default=30, help="job links on the stub listing page")
+    parser.add_argument("--payload-bytes", type=int, default=20000, help="approximate listing markdown size")
+    parser.add_argument("--llm-links", action="store_true", help="use links the local extractor cannot match")
+    parser.add_argument("--cache", action="store_true", help="leave the scrape and LLM caches enabled")
+    parser.add_argument("--timeout", type=float, default=300, help="client timeout per request")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra env for app.py")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    latency = report["latency_seconds"]
+    print(f"requests      {report['requests']} @ concurrency {report['concurrency']} -> {report['statuses']}")
+    print(f"throughput    {report['requests_per_second']} req/s over {report['wall_seconds']}s")
+    print(f"latency       p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s  max {latency['max']}s")
+    for name, per_request in report["upstream_calls_per_request"].items():
+        print(f"upstream      {name}: {per_request} per request")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+Entry = Tuple[float, Any]
+
+
+def make_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """Size-bounded LRU of (expires_at, value) entries."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """JSON entries in a SQLite file, shareable across processes and restarts."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional disk backend, with per-namespace hit/miss counts."""
+
+    def __init__(self, max_entries: int, path: Optional[str] = None) -> None:
+        self.memory = MemoryBackend(max_entries)
+        self.disk = SqliteBackend(path) if path else None
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        key = f"{namespace}:{key}"
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry[1], entry[0])
+        if entry is None:
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        return copy.deepcopy(entry[1])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        key = f"{namespace}:{key}"
+        expires_at = time.time() + ttl
+        self.memory.set(key, copy.deepcopy(value), expires_at)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+        return {
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "disk_path": self.disk.path if self.disk is not None else None,
+            "namespaces": namespaces,
+        }
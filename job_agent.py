@@ -1,293 +1,113 @@
-# %%
-# %%
-import os
-import requests
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-# ANSI color codes
-class Colors:
-    CYAN = '\033[96m'
-    YELLOW = '\033[93m'
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    MAGENTA = '\033[95m'
-    BLUE = '\033[94m'
-    RESET = '\033[0m'
-# Load environment variables
-load_dotenv()
-
-# Initialize the FirecrawlApp with your API key
-firecrawl_api_key = os.getenv("FIRECRAWL_API_KEY")
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Set the jobs page URL
-jobs_page_url = "https://www.google.com/about/careers/applications/jobs/results"
-
-# Resume
-resume_paste = """"
-Eva Chen
-Product Designer based in Greater Seattle Area, 4 years experience designing mobile and web applications.
-
-EDUCATION:
-University of Michigan • 2023
-Master of Science
-Human-Computer Interaction
-
-California College of the Arts • 2017
-Bachelor of Fine Arts
-Graphic Design
-
-Miami University • 2014
-Bachelor of Science
-Accountancy
-
-CERTIFICATIONS:
-AI Products and Services • 2024
-Massachusetts Institute of Tech
-Machine Learning // Deep Learning // Natural Language Processing // Generative AI // AI Product Design Lifecycle
+"""Batch job-hunt CLI: crawl careers pages and recommend roles for many resumes, offline from the API.
 
-PROFESSIONAL EXPERIENCE:
-Individual Product Developer
-Bellevue, WA, United States // Oct.2025 to present
-Developed an AI-Podcast from scratch using mutiple APIs and multiple AI agent tools. Research users with AI agent tools. Earned first 2000 users with MVP Version.
-
-T-Mobile • Product Designer
-Bellevue, WA, United States // 2023 TO Oct.2025
-Sole Lead Designer for the account management vertical, collaborating with 10+ stakeholders to redesign the account dashboard, resulting in 1,000 fewer customer support calls per month and enhanced users self-service capabilities.
-Led the design of the Manage tab, a key tab of the TLife apps 5-tab structure, utilizing traffic analytics and user research to deliver data-driven designs that contributed to the apps ranking as the #1 Free Lifestyle app in the Apple App Store.
-
-Currents AI • Founding Product Designer
-Remote, United States // 2024 TO Oct.2025
-Led the end-to-end design of an AI-powered platform enabling small e-commerce businesses to analyze and understand customer sentiments from social media feedback. Collaborated with engineers to train and refine natural language processing models, ensuring outputs aligned with market analysis needs. Achieved rapid user adoption, garnering over 2,000 users and converting 10+ to paid subscribers within the first week post-launch.
-
-Indeed.com • UX Design Intern
-Seattle, WA, United States // 2022
-Developed a system providing customized guidance to help users enhance their profiles and stand out in the job market.
-Collaborated with data scientists to ensure feasibility, led innovative design workshops, and conducted concept testing, yielded positive results.
-
-University of Michigan Hospital • UX Research Intern
-Ann Arbor, MI, United States // 2021 TO 2022
-Enhanced the surgical safety report system by researching and implementing recommendations to streamline surgical data entry, significantly saving time for nurses and improving the medical safety learning database. Employed methods including contextual inquiries, usability testing, and heuristic evaluations to optimize staff efficiency and system functionality.
-
-General Motors • Product Designer
-Shanghai, China // 2019 TO 2021
-Led the design of a chatbot, partnering seamlessly with engineering teams to navigate security barriers and elevate the user experience on Buick vehicles.
-Led the comprehensive redesign of the Fleet Service Platform, enhancing data visualization to improve vehicle inventory monitoring, which increased the platforms revenue contribution to 50 PERCENT of the departments earnings.
-Spearheaded the design and iterations of an internal tool, boosting customer service efficiency. Established and maintained the design system, collaborated with project managers to adapt to evolving user needs, expanding the user base from 20 to 3,000.
-
-Adinnet Design Agency • UX Designer
-Shanghai, China // 2018 to 2019
-Designed a cargo management tool for the worlds second- largest ocean shipping company, enhancing tracking, cargo handling, and billing workflows.
+    python job_agent.py resumes/*.txt --urls-file careers.txt --concurrency 4 -o results.ndjson
 
+Writes one NDJSON line per careers page as soon as that page's crawl and recommendations finish.
 """
 
-# First, scrape the jobs page using Firecrawl
-try:
-    response = requests.post(
-        "https://api.firecrawl.dev/v1/scrape",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {firecrawl_api_key}"
-        },
-        json={
-            "url": jobs_page_url,
-            "formats": ["markdown"]
-        }
-    )
-    
-    if response.status_code == 200:
-        result = response.json()
-        if result.get('success'):
-            html_content = result['data']['markdown']
-            # Define the O1 prompt for extracting apply links
-            prompt = f"""
-            Extract up to 5 job application links from the given markdown content.
-            Return the result as a JSON object with a single key 'apply_links' containing an array of strings (the links).
-            The output should be a valid JSON object, with no additional text.
-            Do not include any JSON markdown formatting or code block indicators.
-            Provide only the raw JSON object as the response.
+import argparse
+import json
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, TextIO
 
-            Example of the expected format:
-            {{"apply_links": ["https://example.com/job1", "https://example.com/job2", ...]}}
+from pipeline import DEFAULT_JOBS_URL, CrawlOptions, PipelineError, crawl, recommend_many
+from rate_limit import run_in_flow
 
-            Markdown content:
-            {html_content[:100000]}
-            """
-            print(f"{Colors.GREEN}Successfully scraped the jobs page{Colors.RESET}")
-        else:
-            print(f"{Colors.RED}Failed to scrape the jobs page: {result.get('message', 'Unknown error')}{Colors.RESET}")
-            html_content = ""
-    else:
-        print(f"{Colors.RED}Error {response.status_code}: {response.text}{Colors.RESET}")
-        html_content = ""
-except requests.RequestException as e:
-    print(f"{Colors.RED}An error occurred while scraping: {str(e)}{Colors.RESET}")
-    html_content = ""
-except json.JSONDecodeError as e:
-    print(f"{Colors.RED}Error decoding JSON response: {str(e)}{Colors.RESET}")
-    html_content = ""
-except Exception as e:
-    print(f"{Colors.RED}An unexpected error occurred while scraping: {str(e)}{Colors.RESET}")
-    html_content = ""
 
-# Extract apply links from the scraped HTML using O1
-apply_links = []
-if html_content:
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-        
-        if completion.choices:
-            print(completion.choices[0].message.content)
-            result = json.loads(completion.choices[0].message.content.strip())
-        
-            apply_links = result['apply_links']
-            print(f"{Colors.GREEN}Successfully extracted {len(apply_links)} apply links{Colors.RESET}")
-        else:
-            print(f"{Colors.RED}No apply links extracted{Colors.RESET}")
-    except json.JSONDecodeError as e:
-        print(f"{Colors.RED}Error decoding JSON from OpenAI response: {str(e)}{Colors.RESET}")
-    except KeyError as e:
-        print(f"{Colors.RED}Expected key not found in OpenAI response: {str(e)}{Colors.RESET}")
-    except Exception as e:
-        print(f"{Colors.RED}An unexpected error occurred during extraction: {str(e)}{Colors.RESET}")
-else:
-    print(f"{Colors.RED}No HTML content to process{Colors.RESET}")
+def _read_lines(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip() and not line.lstrip().startswith("#")]
 
-# Initialize a list to store the extracted data
-extracted_data = []
 
+def _read_resume(path: str) -> str:
+    with open(path, encoding="utf-8") as handle:
+        return handle.read()
 
-# %%
-print(f"{Colors.CYAN}Apply links:{Colors.RESET}")
-for link in apply_links:
-    print(f"{Colors.YELLOW}{link}{Colors.RESET}")
 
-# %%
-# Process each apply link
-for index, link in enumerate(apply_links):
+def _run_url(url: str, resume_paths: List[str], resumes: List[str], options: CrawlOptions) -> Dict[str, Any]:
+    options = options.model_copy(update={"jobs_page_url": url})
     try:
-        response = requests.post(
-            "https://api.firecrawl.dev/v1/scrape",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {firecrawl_api_key}"
-            },
-            json={
-                "url": link,
-                "formats": ["extract"],
-                "actions": [{
-                    "type": "click",
-                    "selector": "#job-overview"
-                }],
-                "extract": {
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "job_title": {"type": "string"},
-                            "sub_division_of_organization": {"type": "string"},
-                            "key_skills": {"type": "array", "items": {"type": "string"}},
-                            "compensation": {"type": "string"},
-                            "location": {"type": "string"},
-                            "apply_link": {"type": "string"}
-                        },
-                        "required": ["job_title", "sub_division_of_organization", "key_skills", "compensation", "location", "apply_link"]
-                    }
-                }
-            }
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('success'):
-                extracted_data.append(result['data']['extract'])
-                print(f"{Colors.GREEN}Data extracted for job {index}{Colors.RESET}")
-            else:
-                print(f"")
-        else:
-            print(f"")
-    except Exception as e:
-        print(f"")
-
-
-# %%
-# %%
-# Print the extracted data
-print(f"{Colors.CYAN}Extracted data:{Colors.RESET}")
-for job in extracted_data:
-    print(json.dumps(job, indent=2))
-    print(f"{Colors.MAGENTA}{'-' * 50}{Colors.RESET}")
-
-
-# %%
-
-
-
-
-# Use o1-preview to choose which jobs should be applied to based on the resume
-prompt = f"""
-Please analyze the resume and job listings, and return a JSON list of the top 3 roles that best fit the candidate's experience and skills. Include only the job title, compensation, and apply link for each recommended role. The output should be a valid JSON array of objects in the following format, with no additional text:
-
-[
-  {{
-    "job_title": "Job Title",
-    "compensation": "Compensation (if available, otherwise empty string)",
-    "apply_link": "Application URL"
-  }},
-  ...
-]
-
-Based on the following resume:
-{resume_paste}
-
-And the following job listings:
-{json.dumps(extracted_data, indent=2)}
-"""
-
-completion = client.chat.completions.create(
-    model="gpt-4o-mini",
-    messages=[
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": prompt
-                }
-            ]
+        apply_links, extracted_data = crawl(options, None)
+    except PipelineError as exc:
+        return {"jobs_page_url": url, "error": exc.detail, "status_code": exc.status_code}
+    results = recommend_many(resumes, options, extracted_data)
+    for result in results:
+        result["resume"] = resume_paths[result["resume_index"]]
+    return {
+        "jobs_page_url": url,
+        "apply_links": apply_links,
+        "extracted_data": extracted_data,
+        "results": results,
+        "error": None,
+    }
+
+
+def run(urls: List[str], resume_paths: List[str], options: CrawlOptions, concurrency: int, output: TextIO) -> int:
+    """Process every URL with at most `concurrency` crawls in flight; return how many URLs failed."""
+    resumes = [_read_resume(path) for path in resume_paths]
+    failures = 0
+    write_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(run_in_flow, uuid.uuid4().hex, _run_url, url, resume_paths, resumes, options): url
+            for url in urls
         }
-    ]
-)
-
-raw_response_text = (completion.choices[0].message.content or "").strip()
-
-# Be tolerant to any extra text around the JSON array
-try:
-    recommended_jobs = json.loads(raw_response_text)
-except json.JSONDecodeError:
-    start_idx = raw_response_text.find('[')
-    end_idx = raw_response_text.rfind(']')
-    if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-        try:
-            recommended_jobs = json.loads(raw_response_text[start_idx:end_idx+1])
-        except Exception as e:
-            print(f"{Colors.RED}Failed to parse JSON array from model output: {str(e)}{Colors.RESET}")
-            print(raw_response_text)
-            recommended_jobs = []
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                record = future.result()
+            except Exception as exc:
+                record = {"jobs_page_url": url, "error": str(exc) or type(exc).__name__}
+            if record["error"] is not None:
+                failures += 1
+            with write_lock:
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+            print(f"{url}: {len(record.get('extracted_data', []))} jobs, error={record['error']}", file=sys.stderr)
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("resumes", nargs="+", metavar="RESUME", help="resume text files")
+    parser.add_argument("--url", action="append", default=[], help="careers listing URL (repeatable)")
+    parser.add_argument("--urls-file", help="file with one careers listing URL per line")
+    parser.add_argument("--concurrency", type=int, default=2, help="careers pages crawled at once")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output path (default: stdout)")
+    parser.add_argument("--max-jobs", type=int, default=30)
+    parser.add_argument("--max-pages", type=int, default=1)
+    parser.add_argument("--deadline", type=float, default=None, help="per-URL crawl deadline in seconds")
+    parser.add_argument("--recommend-mode", choices=["llm", "local", "map_reduce"], default="llm")
+    parser.add_argument("--refresh", action="store_true", help="re-scrape jobs already in the job store")
+    parser.add_argument("--bypass-llm-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    urls = list(args.url)
+    if args.urls_file:
+        urls.extend(_read_lines(args.urls_file))
+    urls = list(dict.fromkeys(urls)) or [DEFAULT_JOBS_URL]
+
+    settings = {
+        "max_jobs": args.max_jobs,
+        "max_pages": args.max_pages,
+        "recommend_mode": args.recommend_mode,
+        "refresh": args.refresh,
+        "bypass_llm_cache": args.bypass_llm_cache,
+    }
+    if args.deadline is not None:
+        settings["deadline_seconds"] = args.deadline
+    options = CrawlOptions(**settings)
+
+    if args.output == "-":
+        failures = run(urls, args.resumes, options, args.concurrency, sys.stdout)
     else:
-        print(f"{Colors.RED}Model did not return a JSON array as requested.{Colors.RESET}")
-        print(raw_response_text)
-        recommended_jobs = []
+        with open(args.output, "w", encoding="utf-8") as output:
+            failures = run(urls, args.resumes, options, args.concurrency, output)
+    return 1 if failures else 0
 
-print(f"{Colors.CYAN}Recommended jobs:{Colors.RESET}")
-print(json.dumps(recommended_jobs, indent=2))
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+from cache import MemoryBackend, SqliteBackend
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """Runs submitted work on a bounded in-process pool and keeps status records for `ttl` seconds.
+
+    Records live in any cache backend: memory, or SQLite so every worker process can answer polls.
+    """
+
+    def __init__(
+        self, workers: int, max_pending: int, ttl: float, store: Union[MemoryBackend, SqliteBackend]
+    ) -> None:
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apply-job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _save(self, record: Dict[str, Any]) -> None:
+        self.store.set(record["job_id"], dict(record), time.time() + self.ttl)
+
+    def submit(self, fn: Callable[[], Any]) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} jobs already queued or running")
+            self._pending += 1
+        record = {"job_id": uuid.uuid4().hex, "status": "queued", "submitted_at": time.time()}
+        self._save(record)
+        try:
+            self._executor.submit(self._run, dict(record), fn)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return record
+
+    def _run(self, record: Dict[str, Any], fn: Callable[[], Any]) -> None:
+        try:
+            record.update(status="running", started_at=time.time())
+            self._save(record)
+            try:
+                record.update(status="succeeded", result=fn())
+            except Exception as exc:
+                record.update(status="failed", error=getattr(exc, "detail", None) or str(exc) or type(exc).__name__)
+            record["finished_at"] = time.time()
+            self._save(record)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.store.get(job_id)
+        return entry[1] if entry is not None else None
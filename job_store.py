@@ -0,0 +1,160 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from cache import make_key
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    apply_link TEXT PRIMARY KEY,
+    job_title TEXT,
+    sub_division_of_organization TEXT,
+    compensation TEXT,
+    location TEXT COLLATE NOCASE,
+    key_skills TEXT NOT NULL DEFAULT '[]',
+    details TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    listing_hash TEXT NOT NULL DEFAULT '',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_scraped REAL NOT NULL,
+    last_changed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs (location);
+CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs (last_seen);
+CREATE TABLE IF NOT EXISTS job_skills (
+    apply_link TEXT NOT NULL REFERENCES jobs (apply_link) ON DELETE CASCADE,
+    skill TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (apply_link, skill)
+);
+CREATE INDEX IF NOT EXISTS job_skills_skill ON job_skills (skill);
+"""
+
+
+def listing_hash(snippet: str) -> str:
+    return make_key(" ".join(snippet.split())) if snippet else ""
+
+
+class JobStore:
+    """SQLite store of extracted job details keyed by normalized apply link."""
+
+    def __init__(self, path: str, refresh_after: float) -> None:
+        self.path = path
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, links: List[str]) -> Dict[str, sqlite3.Row]:
+        if not links:
+            return {}
+        placeholders = ",".join("?" for _ in links)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM jobs WHERE apply_link IN ({placeholders})", links).fetchall()
+        return {row["apply_link"]: row for row in rows}
+
+    def needs_scrape(self, row: Optional[sqlite3.Row], fingerprint: str) -> bool:
+        if row is None:
+            return True
+        if fingerprint and row["listing_hash"] and fingerprint != row["listing_hash"]:
+            return True
+        return time.time() - row["last_scraped"] >= self.refresh_after
+
+    def touch(self, links: List[str]) -> None:
+        if not links:
+            return
+        placeholders = ",".join("?" for _ in links)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET last_seen = ? WHERE apply_link IN ({placeholders})", [time.time(), *links]
+            )
+
+    def upsert(self, link: str, details: Dict[str, Any], fingerprint: str) -> None:
+        now = time.time()
+        skills = details.get("key_skills") if isinstance(details.get("key_skills"), list) else []
+        skills = sorted({str(skill).strip() for skill in skills if str(skill).strip()}, key=str.lower)
+        content_hash = make_key(details)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._conn.execute(
+                    "SELECT content_hash, last_changed FROM jobs WHERE apply_link = ?", (link,)
+                ).fetchone()
+                changed = previous is None or previous["content_hash"] != content_hash
+                self._conn.execute(
+                    """
+                    INSERT INTO jobs (
+                        apply_link, job_title, sub_division_of_organization, compensation, location, key_skills,
+                        details, content_hash, listing_hash, first_seen, last_seen, last_scraped, last_changed
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (apply_link) DO UPDATE SET
+                        job_title = excluded.job_title,
+                        sub_division_of_organization = excluded.sub_division_of_organization,
+                        compensation = excluded.compensation,
+                        location = excluded.location,
+                        key_skills = excluded.key_skills,
+                        details = excluded.details,
+                        content_hash = excluded.content_hash,
+                        listing_hash = CASE WHEN excluded.listing_hash != '' THEN excluded.listing_hash
+                            ELSE jobs.listing_hash END,
+                        last_seen = excluded.last_seen,
+                        last_scraped = excluded.last_scraped,
+                        last_changed = excluded.last_changed
+                    """,
+                    (
+                        link,
+                        details.get("job_title"),
+                        details.get("sub_division_of_organization"),
+                        details.get("compensation"),
+                        details.get("location"),
+                        json.dumps(skills),
+                        json.dumps(details),
+                        content_hash,
+                        fingerprint,
+                        now,
+                        now,
+                        now,
+                        now if changed else previous["last_changed"],
+                    ),
+                )
+                if changed:
+                    self._conn.execute("DELETE FROM job_skills WHERE apply_link = ?", (link,))
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO job_skills (apply_link, skill) VALUES (?, ?)",
+                        [(link, skill) for skill in skills],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def search(
+        self, location: Optional[str] = None, skill: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT jobs.details FROM jobs"
+        clauses: List[str] = []
+        params: List[Any] = []
+        if skill:
+            query += " JOIN job_skills ON job_skills.apply_link = jobs.apply_link"
+            clauses.append("job_skills.skill = ?")
+            params.append(skill)
+        if location:
+            clauses.append("jobs.location LIKE ?")
+            params.append(f"{location}%")
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY jobs.last_seen DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row["details"]) for row in rows]
+
+    @staticmethod
+    def details(row: sqlite3.Row) -> Dict[str, Any]:
+        return json.loads(row["details"])
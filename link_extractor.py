@@ -0,0 +1,101 @@
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+
+DEFAULT_LINK_PATTERNS: List[Dict[str, Any]] = [
+    {"host": "www.google.com", "path": r"^/about/careers/applications/jobs/results/\d+[^/]*$"},
+]
+
+# Link text may itself hold an image, as in card links like [![logo](logo.png)](https://.../jobs/1).
+_MARKDOWN_LINK = re.compile(r"\[(?:[^\[\]]|!\[[^\]]*\]\([^)]*\))*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+_AUTOLINK = re.compile(r"<(https?://[^>\s]+)>")
+_TRACKING_PARAM = re.compile(r"^(utm_.*|gclid|fbclid|src|ref)$")
+
+
+def compile_patterns(patterns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"host": p["host"].lower(), "path": re.compile(p["path"]), "keep_query": bool(p.get("keep_query"))}
+        for p in patterns
+    ]
+
+
+LINK_PATTERNS = compile_patterns(json.loads(os.getenv("LINK_PATTERNS", "[]")) + DEFAULT_LINK_PATTERNS)
+
+
+def _host_matches(host: str, pattern_host: str) -> bool:
+    return host == pattern_host or host.endswith("." + pattern_host)
+
+
+def _normalize_path(path: str) -> str:
+    return re.sub(r"/{2,}", "/", path).rstrip("/") or "/"
+
+
+def normalize_url(url: str, keep_query: bool = False) -> str:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}.get(parts.scheme):
+        host = f"{host}:{parts.port}"
+    path = _normalize_path(parts.path)
+    query = ""
+    if keep_query:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAM.match(k)]
+        query = urlencode(sorted(params))
+    return urlunsplit((parts.scheme.lower(), host, path, query, ""))
+
+
+def _iter_job_links(
+    markdown: str, base_url: str, patterns: List[Dict[str, Any]]
+) -> Iterator[Tuple[str, str]]:
+    """Yield (normalized url, listing snippet) for every link matching a site pattern.
+
+    The snippet is the markdown between the previous link and this one, i.e. the listing card.
+    """
+    matches = sorted(
+        list(_MARKDOWN_LINK.finditer(markdown)) + list(_AUTOLINK.finditer(markdown)),
+        key=lambda match: match.start(),
+    )
+    previous_end = 0
+    for match in matches:
+        snippet = markdown[previous_end : match.end()]
+        previous_end = match.end()
+        url = urljoin(base_url, match.group(1).strip())
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            continue
+        host = (parts.hostname or "").lower()
+        path = _normalize_path(parts.path)
+        for pattern in patterns:
+            if _host_matches(host, pattern["host"]) and pattern["path"].search(path):
+                yield normalize_url(url, pattern["keep_query"]), snippet
+                break
+
+
+def extract_links(
+    markdown: str,
+    base_url: str,
+    max_links: int,
+    patterns: Optional[List[Dict[str, Any]]] = None,
+) -> List[str]:
+    """Pull job links out of markdown without an LLM; returns [] when no site pattern matches."""
+    links: List[str] = []
+    seen = set()
+    for url, _ in _iter_job_links(markdown, base_url, LINK_PATTERNS if patterns is None else patterns):
+        if url not in seen:
+            seen.add(url)
+            links.append(url)
+            if len(links) >= max_links:
+                break
+    return links
+
+
+def listing_snippets(
+    markdown: str, base_url: str, patterns: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, str]:
+    """Map each matched job link to the listing text leading up to it (all occurrences joined)."""
+    snippets: Dict[str, str] = {}
+    for url, snippet in _iter_job_links(markdown, base_url, LINK_PATTERNS if patterns is None else patterns):
+        snippets[url] = snippets.get(url, "") + snippet
+    return snippets
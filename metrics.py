@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "apply_stage_seconds",
+    "Wall-clock time spent in each apply pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+FIRECRAWL_REQUESTS = Counter(
+    "firecrawl_requests_total",
+    "Firecrawl scrape calls by kind and outcome (HTTP status, timeout, error, unsuccessful)",
+    ["kind", "outcome"],
+)
+JSON_PARSES = Counter(
+    "llm_json_parse_total",
+    "Structured model outputs by result model and validation outcome (valid, repaired, failed)",
+    ["shape", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "openai_tokens_total",
+    "OpenAI token usage reported in completion.usage",
+    ["model", "type"],
+)
+UPSTREAM_WAIT_SECONDS = Histogram(
+    "upstream_scheduler_wait_seconds",
+    "Time calls spent queued for upstream rate-limit capacity",
+    ["upstream"],
+    buckets=STAGE_BUCKETS,
+)
+UPSTREAM_RATE_LIMITED = Counter(
+    "upstream_rate_limited_total",
+    "429 responses received from each upstream",
+    ["upstream"],
+)
+UPSTREAM_RATE = Gauge(
+    "upstream_scheduler_rate",
+    "Current adaptive request rate (per second) allowed to each upstream",
+    ["upstream"],
+    multiprocess_mode="max",
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "Retried upstream calls by kind",
+    ["upstream", "kind"],
+)
+UPSTREAM_HEDGES = Counter(
+    "upstream_hedges_total",
+    "Hedged duplicate calls by kind and which call won the race",
+    ["upstream", "kind", "winner"],
+)
+CIRCUIT_STATE = Gauge(
+    "upstream_circuit_state",
+    "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+    ["upstream"],
+    multiprocess_mode="max",
+)
+CIRCUIT_REJECTIONS = Counter(
+    "upstream_circuit_rejections_total",
+    "Calls failed fast because the upstream circuit was open",
+    ["upstream"],
+)
+JOB_STORE_LOOKUPS = Counter(
+    "job_store_lookups_total",
+    "Crawled links by job store state (fresh rows are served without scraping)",
+    ["state"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests rejected with 429 before running, by the per-API-key limit they hit",
+    ["reason"],
+)
+RECOMMEND_CHUNKS = Counter(
+    "recommend_chunks_total",
+    "Map-reduce recommendation chunk calls by outcome",
+    ["outcome"],
+)
+
+
+class Timings:
+    """Per-request stage durations, summarised as count/total/max seconds per stage."""
+
+    def __init__(self) -> None:
+        self._durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {"count": len(values), "total": round(sum(values), 4), "max": round(max(values), 4)}
+                for stage, values in self._durations.items()
+            }
+
+
+@contextmanager
+def timed(stage: str, timings: Optional[Timings] = None) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        if timings is not None:
+            timings.add(stage, elapsed)
+
+
+def record_usage(model: str, usage: object) -> None:
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None)
+        if count:
+            LLM_TOKENS.labels(model, kind).inc(count)
+
+
+def render() -> Tuple[bytes, str]:
+    """Prometheus exposition for this process, or for all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
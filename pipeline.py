@@ -0,0 +1,851 @@
+"""Crawl, extract and recommend stages shared by the HTTP API (app.py) and the batch CLI (job_agent.py)."""
+
+import os
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Literal, Optional, Tuple, Type
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import httpx
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+
+from cache import TieredCache, make_key
+from job_store import JobStore, listing_hash
+from link_extractor import extract_links, listing_snippets, normalize_url
+from metrics import (
+    FIRECRAWL_REQUESTS,
+    JOB_STORE_LOOKUPS,
+    JSON_PARSES,
+    RECOMMEND_CHUNKS,
+    UPSTREAM_HEDGES,
+    UPSTREAM_RETRIES,
+    Timings,
+    record_usage,
+    timed,
+)
+from prompts import compact_jobs, compact_text, count_tokens, link_lines, truncate_tokens
+from ranking import rank_jobs
+from rate_limit import SchedulerTimeout, UpstreamScheduler, current_flow, parse_retry_after, run_in_flow
+from resilience import (
+    RETRYABLE_STATUSES,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    backoff_delay,
+    hedged,
+)
+from singleflight import SingleFlight
+from transport import create_http_client, create_openai_client
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+load_dotenv()
+
+DEFAULT_JOBS_URL = "https://www.google.com/about/careers/applications/jobs/results"
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = "gpt-4o-mini"
+DETAIL_SCRAPE_CONCURRENCY = int(os.getenv("DETAIL_SCRAPE_CONCURRENCY", "8"))
+DETAIL_SCRAPE_DEADLINE = float(os.getenv("DETAIL_SCRAPE_DEADLINE", "150"))
+LISTING_MAX_PAGES = int(os.getenv("LISTING_MAX_PAGES", "10"))
+LISTING_PAGE_CONCURRENCY = int(os.getenv("LISTING_PAGE_CONCURRENCY", "4"))
+LISTING_PAGE_PARAM = os.getenv("LISTING_PAGE_PARAM", "page")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(DETAIL_SCRAPE_CONCURRENCY * 4)))
+RECOMMEND_CANDIDATES = int(os.getenv("RECOMMEND_CANDIDATES", "10"))
+RECOMMEND_COUNT = 3
+RECOMMEND_CHUNK_SIZE = int(os.getenv("RECOMMEND_CHUNK_SIZE", "10"))
+RECOMMEND_CHUNK_CONCURRENCY = int(os.getenv("RECOMMEND_CHUNK_CONCURRENCY", "4"))
+BATCH_RECOMMEND_CONCURRENCY = int(os.getenv("BATCH_RECOMMEND_CONCURRENCY", "8"))
+FIRECRAWL_RATE_PER_SECOND = float(os.getenv("FIRECRAWL_RATE_PER_SECOND", "5"))
+FIRECRAWL_BURST = float(os.getenv("FIRECRAWL_BURST", "10"))
+FIRECRAWL_MAX_CONCURRENCY = int(os.getenv("FIRECRAWL_MAX_CONCURRENCY", "16"))
+OPENAI_RATE_PER_SECOND = float(os.getenv("OPENAI_RATE_PER_SECOND", "8"))
+OPENAI_BURST = float(os.getenv("OPENAI_BURST", "8"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+OPENAI_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("OPENAI_COMPLETION_TOKENS_ESTIMATE", "500"))
+OPENAI_RETRY_ATTEMPTS = max(1, int(os.getenv("OPENAI_RETRY_ATTEMPTS", "3")))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "8"))
+LINK_PROMPT_TOKEN_BUDGET = int(os.getenv("LINK_PROMPT_TOKEN_BUDGET", "24000"))
+RECOMMEND_PROMPT_TOKEN_BUDGET = int(os.getenv("RECOMMEND_PROMPT_TOKEN_BUDGET", "8000"))
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+UPSTREAM_MAX_WAIT = float(os.getenv("UPSTREAM_MAX_WAIT", "120"))
+FIRECRAWL_RETRY_ATTEMPTS = max(1, int(os.getenv("FIRECRAWL_RETRY_ATTEMPTS", "3")))
+FIRECRAWL_RETRY_BASE_DELAY = float(os.getenv("FIRECRAWL_RETRY_BASE_DELAY", "0.5"))
+FIRECRAWL_RETRY_MAX_DELAY = float(os.getenv("FIRECRAWL_RETRY_MAX_DELAY", "8"))
+FIRECRAWL_HEDGE_ENABLED = os.getenv("FIRECRAWL_HEDGE_ENABLED", "1") != "0"
+FIRECRAWL_HEDGE_PERCENTILE = float(os.getenv("FIRECRAWL_HEDGE_PERCENTILE", "95"))
+FIRECRAWL_HEDGE_MIN_DELAY = float(os.getenv("FIRECRAWL_HEDGE_MIN_DELAY", "2"))
+FIRECRAWL_HEDGE_MIN_SAMPLES = int(os.getenv("FIRECRAWL_HEDGE_MIN_SAMPLES", "20"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH") or None
+JOB_STORE_REFRESH_SECONDS = float(os.getenv("JOB_STORE_REFRESH_SECONDS", "604800"))
+SCRAPE_CACHE_LISTING_TTL = float(os.getenv("SCRAPE_CACHE_LISTING_TTL", "900"))
+SCRAPE_CACHE_DETAIL_TTL = float(os.getenv("SCRAPE_CACHE_DETAIL_TTL", "21600"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "2048"))
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH") or None
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or None
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") != "0"
+
+REPAIR_PROMPT = """The JSON below does not match the {name} schema.
+Validation error: {error}
+Schema: {schema}
+Return only the corrected JSON object, with no additional text.
+
+JSON:
+{output}"""
+
+
+JOB_DETAILS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "job_title": {"type": "string"},
+        "sub_division_of_organization": {"type": "string"},
+        "key_skills": {"type": "array", "items": {"type": "string"}},
+        "compensation": {"type": "string"},
+        "location": {"type": "string"},
+        "apply_link": {"type": "string"},
+    },
+    "required": [
+        "job_title",
+        "sub_division_of_organization",
+        "key_skills",
+        "compensation",
+        "location",
+        "apply_link",
+    ],
+}
+
+CREDENTIAL_ENV_VARS = ("FIRECRAWL_API_KEY", "OPENAI_API_KEY")
+
+_clients_lock = threading.Lock()
+_http: Optional[httpx.Client] = None
+_openai: Optional["OpenAI"] = None
+
+scrape_cache = TieredCache(SCRAPE_CACHE_MAX_ENTRIES, SCRAPE_CACHE_PATH)
+llm_cache = TieredCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH)
+inflight = SingleFlight()
+job_store = JobStore(JOB_STORE_PATH, JOB_STORE_REFRESH_SECONDS) if JOB_STORE_PATH else None
+firecrawl_limiter = UpstreamScheduler(
+    "firecrawl",
+    FIRECRAWL_RATE_PER_SECOND,
+    FIRECRAWL_BURST,
+    FIRECRAWL_MAX_CONCURRENCY,
+    max_wait=UPSTREAM_MAX_WAIT,
+)
+firecrawl_breaker = CircuitBreaker("firecrawl", CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+firecrawl_latency = LatencyTracker()
+# Every task on this pool already holds a firecrawl_limiter slot, so it never queues behind the limiter.
+hedge_pool = ThreadPoolExecutor(max_workers=FIRECRAWL_MAX_CONCURRENCY, thread_name_prefix="firecrawl-hedge")
+openai_limiter = UpstreamScheduler(
+    "openai",
+    OPENAI_RATE_PER_SECOND,
+    OPENAI_BURST,
+    OPENAI_MAX_CONCURRENCY,
+    tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+    max_wait=UPSTREAM_MAX_WAIT,
+)
+
+
+class PipelineError(Exception):
+    """A stage failed in a way the caller should report; status_code follows HTTP semantics."""
+
+    def __init__(self, status_code: int, detail: str, headers: Optional[Dict[str, str]] = None) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class CrawlOptions(BaseModel):
+    jobs_page_url: Optional[str] = None
+    max_jobs: int = Field(default=30, ge=1, le=100)
+    max_pages: int = Field(default=1, ge=1, le=LISTING_MAX_PAGES)
+    concurrency: int = Field(default=DETAIL_SCRAPE_CONCURRENCY, ge=1, le=32)
+    deadline_seconds: float = Field(default=DETAIL_SCRAPE_DEADLINE, gt=0, le=600)
+    recommend_mode: Literal["llm", "local", "map_reduce"] = "llm"
+    candidates: int = Field(default=RECOMMEND_CANDIDATES, ge=RECOMMEND_COUNT, le=100)
+    include_timings: bool = False
+    refresh: bool = False
+    bypass_llm_cache: bool = False
+
+
+def _valid_items(item_model: Any, items: Any) -> Any:
+    """Keep the list items that validate on their own, so one malformed entry does not sink the rest."""
+    if not isinstance(items, list):
+        return items
+    adapter = TypeAdapter(item_model)
+    valid = []
+    for item in items:
+        try:
+            valid.append(adapter.validate_python(item))
+        except ValidationError:
+            continue
+    return valid
+
+
+class ApplyLinks(BaseModel):
+    apply_links: List[str]
+
+    @field_validator("apply_links", mode="before")
+    @classmethod
+    def _drop_invalid(cls, items: Any) -> Any:
+        return _valid_items(str, items)
+
+
+class RecommendedJob(BaseModel):
+    job_title: str
+    compensation: str
+    apply_link: str
+
+
+class Recommendations(BaseModel):
+    recommended_jobs: List[RecommendedJob]
+
+    @field_validator("recommended_jobs", mode="before")
+    @classmethod
+    def _drop_invalid(cls, items: Any) -> Any:
+        return _valid_items(RecommendedJob, items)
+
+
+def missing_credentials() -> List[str]:
+    return [name for name in CREDENTIAL_ENV_VARS if not os.getenv(name)]
+
+
+def _required_env(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise RuntimeError(f"{name} is not set")
+    return value
+
+
+def firecrawl_http() -> httpx.Client:
+    """The shared Firecrawl client, created on first use so imports and worker boots stay cheap."""
+    global _http
+    if _http is None:
+        with _clients_lock:
+            if _http is None:
+                _http = create_http_client(
+                    HTTP_POOL_SIZE,
+                    base_url=FIRECRAWL_API_URL,
+                    headers={
+                        "Content-Type": "application/json",
+                        "Authorization": f"Bearer {_required_env('FIRECRAWL_API_KEY')}",
+                    },
+                )
+    return _http
+
+
+def openai_client() -> "OpenAI":
+    global _openai
+    if _openai is None:
+        with _clients_lock:
+            if _openai is None:
+                _openai = create_openai_client(_required_env("OPENAI_API_KEY"), HTTP_POOL_SIZE, OPENAI_BASE_URL)
+    return _openai
+
+
+def warm_up() -> None:
+    """Create both upstream clients; raises RuntimeError when a credential is missing."""
+    firecrawl_http()
+    openai_client()
+
+
+def _load_json(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start : end + 1])
+
+
+def _strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Close every object in a Pydantic JSON schema, as strict structured output requires."""
+    if schema.get("type") == "object":
+        schema["additionalProperties"] = False
+        schema["required"] = list(schema.get("properties", {}))
+    for value in schema.values():
+        if isinstance(value, dict):
+            _strict_schema(value)
+    return schema
+
+
+def _response_format(result_model: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    if not LLM_STRUCTURED_OUTPUT:
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": result_model.__name__,
+            "strict": True,
+            "schema": _strict_schema(result_model.model_json_schema()),
+        },
+    }
+
+
+def _validate(result_model: Type[BaseModel], content: str) -> Tuple[Optional[BaseModel], str]:
+    try:
+        return result_model.model_validate(_load_json(content)), ""
+    except (ValueError, ValidationError) as exc:
+        return None, str(exc)
+
+
+def _create_completion(messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    """One chat completion through openai_limiter.
+
+    The SDK's own retries are off (see transport.py) so a 429 reaches the scheduler at once: it
+    pauses every caller, and this call retries once the pause lets it through. Rate limits that
+    outlast the retries become 503s with Retry-After; connection errors and 5xx back off and retry.
+    """
+    estimated = count_tokens(json.dumps(messages)) + OPENAI_COMPLETION_TOKENS_ESTIMATE
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    extra: Dict[str, Any] = {"response_format": response_format} if response_format else {}
+    for attempt in range(OPENAI_RETRY_ATTEMPTS):
+        last_attempt = attempt + 1 == OPENAI_RETRY_ATTEMPTS
+        try:
+            with openai_limiter.slot(estimated):
+                completion = openai_client().chat.completions.create(model=LLM_MODEL, messages=messages, **extra)
+            break
+        except SchedulerTimeout as exc:
+            raise PipelineError(status_code=503, detail=str(exc), headers={"Retry-After": "30"})
+        except RateLimitError as exc:
+            retry_after = parse_retry_after(exc.response.headers.get("retry-after"))
+            openai_limiter.report(429, retry_after)
+            if last_attempt:
+                raise PipelineError(
+                    status_code=503,
+                    detail=f"OpenAI rate limit: {exc}",
+                    headers={"Retry-After": str(int(retry_after or 30) + 1)},
+                )
+        except (APIConnectionError, InternalServerError):
+            if last_attempt:
+                raise
+            time.sleep(backoff_delay(attempt, OPENAI_RETRY_BASE_DELAY, OPENAI_RETRY_MAX_DELAY))
+        UPSTREAM_RETRIES.labels("openai", "completion").inc()
+    openai_limiter.report(200)
+    if completion.usage is not None:
+        openai_limiter.settle(estimated, completion.usage.total_tokens)
+    record_usage(LLM_MODEL, completion.usage)
+    return (completion.choices[0].message.content or "").strip()
+
+
+def _structured_completion(
+    messages: List[Dict[str, Any]], result_model: Type[BaseModel], cache_key: str
+) -> Optional[BaseModel]:
+    """Run a completion constrained to result_model's schema, with one repair call if validation fails.
+
+    The repair call only sends the invalid output and the validation error, not the original prompt.
+    """
+    response_format = _response_format(result_model)
+    content = _create_completion(messages, response_format)
+    result, error = _validate(result_model, content)
+    outcome = "valid"
+    if result is None:
+        repair = REPAIR_PROMPT.format(
+            name=result_model.__name__,
+            schema=json.dumps(result_model.model_json_schema(), separators=(",", ":")),
+            error=truncate_tokens(error, 300),
+            output=truncate_tokens(content, 2000),
+        )
+        result, _ = _validate(result_model, _create_completion([{"role": "user", "content": repair}], response_format))
+        outcome = "repaired" if result is not None else "failed"
+    JSON_PARSES.labels(result_model.__name__, outcome).inc()
+    if result is not None:
+        llm_cache.set("completion", cache_key, result.model_dump(), LLM_CACHE_TTL)
+    return result
+
+
+def _complete(prompt: str, result_model: Type[BaseModel], use_cache: bool = True) -> Optional[BaseModel]:
+    """Run a structured completion and return the validated result, or None when it stays invalid.
+
+    Validated results are cached by model, schema and messages; use_cache=False skips the lookup
+    but still refreshes the cached entry.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    cache_key = make_key(LLM_MODEL, result_model.__name__, messages)
+    if use_cache:
+        cached = llm_cache.get("completion", cache_key)
+        if cached is not None:
+            return result_model.model_validate(cached)
+    return inflight.do(f"llm:{cache_key}", lambda: _structured_completion(messages, result_model, cache_key))
+
+
+def _firecrawl_send(kind: str, body: Dict[str, Any], timeout: float) -> httpx.Response:
+    """POST one scrape on a firecrawl_limiter slot the caller already holds, releasing it afterwards."""
+    try:
+        started = time.monotonic()
+        response = firecrawl_http().post("/v1/scrape", json=body, timeout=timeout)
+        elapsed = time.monotonic() - started
+    finally:
+        firecrawl_limiter.release()
+    firecrawl_limiter.report(response.status_code, parse_retry_after(response.headers.get("retry-after")))
+    if response.status_code == 200:
+        firecrawl_latency.observe(kind, elapsed)
+    return response
+
+
+def _firecrawl_attempt(
+    kind: str, body: Dict[str, Any], timeout: float, hedge_after: Optional[float]
+) -> Tuple[httpx.Response, str]:
+    # Wait for a slot before starting the hedge clock so time spent queued never triggers a hedge,
+    # and only send the duplicate on spare capacity nobody is waiting for.
+    firecrawl_limiter.acquire()
+    return hedged(
+        lambda: _firecrawl_send(kind, body, timeout), hedge_after, hedge_pool, firecrawl_limiter.try_acquire
+    )
+
+
+def _hedge_delay(kind: str) -> Optional[float]:
+    if not FIRECRAWL_HEDGE_ENABLED:
+        return None
+    observed = firecrawl_latency.percentile(kind, FIRECRAWL_HEDGE_PERCENTILE, FIRECRAWL_HEDGE_MIN_SAMPLES)
+    return None if observed is None else max(observed, FIRECRAWL_HEDGE_MIN_DELAY)
+
+
+def _firecrawl_post(kind: str, body: Dict[str, Any], timeout: float) -> httpx.Response:
+    """POST /v1/scrape with circuit breaking, hedging past the observed tail latency and jittered retries."""
+    hedge_after = _hedge_delay(kind)
+    for attempt in range(FIRECRAWL_RETRY_ATTEMPTS):
+        last_attempt = attempt + 1 == FIRECRAWL_RETRY_ATTEMPTS
+        retry_after = None
+        firecrawl_breaker.before_call()
+        try:
+            response, winner = _firecrawl_attempt(kind, body, timeout, hedge_after)
+        except (httpx.TimeoutException, httpx.TransportError):
+            firecrawl_breaker.record_failure()
+            if last_attempt:
+                raise
+        except BaseException:
+            firecrawl_breaker.record_ignored()
+            raise
+        else:
+            if winner != "none":
+                UPSTREAM_HEDGES.labels("firecrawl", kind, winner).inc()
+            if response.status_code >= 500 or response.status_code == 408:
+                firecrawl_breaker.record_failure()
+            else:
+                firecrawl_breaker.record_success()
+            if last_attempt or response.status_code not in RETRYABLE_STATUSES:
+                return response
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+        UPSTREAM_RETRIES.labels("firecrawl", kind).inc()
+        time.sleep(backoff_delay(attempt, FIRECRAWL_RETRY_BASE_DELAY, FIRECRAWL_RETRY_MAX_DELAY, retry_after))
+    raise AssertionError("unreachable")
+
+
+def _fetch_markdown(body: Dict[str, Any], cache_key: str) -> str:
+    try:
+        response = _firecrawl_post("listing", body, 60)
+    except SchedulerTimeout as exc:
+        FIRECRAWL_REQUESTS.labels("listing", "throttled").inc()
+        raise PipelineError(status_code=503, detail=str(exc), headers={"Retry-After": "30"})
+    except CircuitOpenError as exc:
+        FIRECRAWL_REQUESTS.labels("listing", "circuit_open").inc()
+        retry_after = str(int(firecrawl_breaker.retry_after()) + 1)
+        raise PipelineError(status_code=503, detail=str(exc), headers={"Retry-After": retry_after})
+    except httpx.TimeoutException as exc:
+        FIRECRAWL_REQUESTS.labels("listing", "timeout").inc()
+        raise PipelineError(status_code=502, detail=f"Firecrawl request timed out: {exc}")
+    except httpx.HTTPError as exc:
+        FIRECRAWL_REQUESTS.labels("listing", "error").inc()
+        raise PipelineError(status_code=502, detail=f"Firecrawl request failed: {exc}")
+    if response.status_code != 200:
+        FIRECRAWL_REQUESTS.labels("listing", str(response.status_code)).inc()
+        raise PipelineError(status_code=502, detail=f"Firecrawl error {response.status_code}: {response.text}")
+    payload = response.json()
+    if not payload.get("success"):
+        FIRECRAWL_REQUESTS.labels("listing", "unsuccessful").inc()
+        raise PipelineError(status_code=502, detail=payload.get("message", "Firecrawl scrape failed"))
+    FIRECRAWL_REQUESTS.labels("listing", "200").inc()
+    markdown = payload["data"]["markdown"]
+    scrape_cache.set("listing", cache_key, markdown, SCRAPE_CACHE_LISTING_TTL)
+    return markdown
+
+
+def _scrape_markdown(url: str) -> str:
+    body = {"url": url, "formats": ["markdown"]}
+    cache_key = make_key(body)
+    cached = scrape_cache.get("listing", cache_key)
+    if cached is not None:
+        return cached
+    return inflight.do(f"listing:{cache_key}", lambda: _fetch_markdown(body, cache_key))
+
+
+def _extract_apply_links(
+    markdown: str, max_jobs: int, base_url: str, use_cache: bool = True, allow_llm: bool = True
+) -> List[str]:
+    links = extract_links(markdown, base_url, max_jobs)
+    if links or not allow_llm:
+        return links
+
+    instructions = f"""Extract up to {max_jobs} job application links from the given markdown content.
+Return the result as a JSON object with a single key 'apply_links' containing an array of strings (the links).
+The output should be a valid JSON object, with no additional text.
+Do not include any JSON markdown formatting or code block indicators.
+Provide only the raw JSON object as the response.
+
+Example of the expected format:
+{{"apply_links": ["https://example.com/job1", "https://example.com/job2", ...]}}
+
+Markdown content:
+"""
+    content_budget = LINK_PROMPT_TOKEN_BUDGET - count_tokens(instructions)
+    prompt = instructions + truncate_tokens(link_lines(markdown) or compact_text(markdown), content_budget)
+    result = _complete(prompt, ApplyLinks, use_cache)
+    if result is None:
+        raise PipelineError(status_code=502, detail="Failed to extract apply links from model output")
+    links = [normalize_url(urljoin(base_url, link), keep_query=True) for link in result.apply_links]
+    return list(dict.fromkeys(links))[:max_jobs]
+
+
+def _job_details_request(link: str) -> Dict[str, Any]:
+    return {
+        "url": link,
+        "formats": ["extract"],
+        "actions": [{"type": "click", "selector": "#job-overview"}],
+        "extract": {"schema": JOB_DETAILS_SCHEMA},
+    }
+
+
+def _fetch_job_details(body: Dict[str, Any], cache_key: str) -> Optional[Dict[str, Any]]:
+    try:
+        response = _firecrawl_post("detail", body, 120)
+    except SchedulerTimeout:
+        FIRECRAWL_REQUESTS.labels("detail", "throttled").inc()
+        return None
+    except CircuitOpenError:
+        FIRECRAWL_REQUESTS.labels("detail", "circuit_open").inc()
+        return None
+    except httpx.TimeoutException:
+        FIRECRAWL_REQUESTS.labels("detail", "timeout").inc()
+        return None
+    except httpx.HTTPError:
+        FIRECRAWL_REQUESTS.labels("detail", "error").inc()
+        return None
+    if response.status_code != 200:
+        FIRECRAWL_REQUESTS.labels("detail", str(response.status_code)).inc()
+        return None
+    try:
+        payload = response.json()
+        if not payload.get("success"):
+            FIRECRAWL_REQUESTS.labels("detail", "unsuccessful").inc()
+            return None
+        details = payload["data"]["extract"]
+    except Exception:
+        FIRECRAWL_REQUESTS.labels("detail", "invalid_payload").inc()
+        return None
+    FIRECRAWL_REQUESTS.labels("detail", "200").inc()
+    if details:
+        scrape_cache.set("detail", cache_key, details, SCRAPE_CACHE_DETAIL_TTL)
+    return details
+
+
+def _scrape_job_details(link: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """Detail extract for one job; use_cache=False always scrapes but still refreshes the cached entry."""
+    body = _job_details_request(link)
+    cache_key = make_key(body)
+    cached = scrape_cache.get("detail", cache_key) if use_cache else None
+    if cached is not None:
+        return cached
+    return inflight.do(f"detail:{cache_key}", lambda: _fetch_job_details(body, cache_key))
+
+
+def _timed_job_details(link: str, timings: Optional[Timings], use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    with timed("detail_scrape", timings):
+        return _scrape_job_details(link, use_cache)
+
+
+def _recommend_locally(resume: str, extracted_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "job_title": job.get("job_title", ""),
+            "compensation": job.get("compensation", ""),
+            "apply_link": job.get("apply_link", ""),
+            "score": round(score, 4),
+        }
+        for score, job in rank_jobs(resume, extracted_data, RECOMMEND_COUNT)
+    ]
+
+
+def _model_recommendations(
+    resume: str, extracted_data: List[Dict[str, Any]], candidates: int, use_cache: bool
+) -> Optional[List[Dict[str, Any]]]:
+    """The model's picks among the top `candidates` pre-ranked jobs, or None if its output never validated."""
+    shortlist = [job for _, job in rank_jobs(resume, extracted_data, candidates)]
+    instructions = """Please analyze the resume and job listings, and return the top 3 roles that best fit the candidate's experience and skills. Include only the job title, compensation, and apply link for each recommended role. The output should be a valid JSON object in the following format, with no additional text:
+{{"recommended_jobs": [{{"job_title": "Job Title", "compensation": "Compensation (if available, otherwise empty string)", "apply_link": "Application URL"}}, ...]}}
+
+Based on the following resume:
+{resume}
+
+And the following job listings, one JSON object per line:
+{jobs}"""
+    resume = truncate_tokens(compact_text(resume), RESUME_TOKEN_BUDGET)
+    jobs_budget = RECOMMEND_PROMPT_TOKEN_BUDGET - count_tokens(instructions) - count_tokens(resume)
+    prompt = instructions.format(resume=resume, jobs=compact_jobs(shortlist, jobs_budget))
+    result = _complete(prompt, Recommendations, use_cache)
+    return [job.model_dump() for job in result.recommended_jobs] if result is not None else None
+
+
+def _recommend_jobs(
+    resume: str,
+    extracted_data: List[Dict[str, Any]],
+    candidates: int = RECOMMEND_CANDIDATES,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    return _model_recommendations(resume, extracted_data, candidates, use_cache) or []
+
+
+def _recommend_chunk(resume: str, chunk: List[Dict[str, Any]], use_cache: bool) -> List[Dict[str, Any]]:
+    """Map step: the chunk's jobs the model picked, as full job records.
+
+    Picks are matched back by apply link. A job whose link is missing or shared within the chunk
+    is shown to the model under a positional stand-in link so it can still be picked.
+    """
+    link_counts = Counter(job.get("apply_link") for job in chunk)
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for position, job in enumerate(chunk, 1):
+        link = job.get("apply_link")
+        by_key[link if link and link_counts[link] == 1 else f"job-{position}"] = job
+    try:
+        picks = _model_recommendations(
+            resume, [{**job, "apply_link": key} for key, job in by_key.items()], len(chunk), use_cache
+        )
+    except Exception:
+        picks = None
+    if picks is None:
+        RECOMMEND_CHUNKS.labels("failed").inc()
+        return []
+    RECOMMEND_CHUNKS.labels("ok").inc()
+    keys = dict.fromkeys(pick.get("apply_link") for pick in picks)
+    return [by_key[key] for key in keys if key in by_key]
+
+
+def _recommend_map_reduce(
+    resume: str, extracted_data: List[Dict[str, Any]], use_cache: bool = True
+) -> List[Dict[str, Any]]:
+    """Pick the top roles per fixed-size chunk in parallel, then choose among the survivors in one final call.
+
+    A chunk whose call fails only drops that chunk's jobs from the final round.
+    """
+    if len(extracted_data) <= RECOMMEND_CHUNK_SIZE:
+        return _recommend_jobs(resume, extracted_data, len(extracted_data), use_cache)
+    chunks = [
+        extracted_data[start : start + RECOMMEND_CHUNK_SIZE]
+        for start in range(0, len(extracted_data), RECOMMEND_CHUNK_SIZE)
+    ]
+    flow_id = current_flow.get()
+    with ThreadPoolExecutor(max_workers=min(RECOMMEND_CHUNK_CONCURRENCY, len(chunks))) as executor:
+        shortlists = list(
+            executor.map(lambda chunk: run_in_flow(flow_id, _recommend_chunk, resume, chunk, use_cache), chunks)
+        )
+    finalists = [job for shortlist in shortlists for job in shortlist]
+    if not finalists:
+        return []
+    return _recommend_jobs(resume, finalists, len(finalists), use_cache)
+
+
+def recommend(
+    resume: str, options: CrawlOptions, extracted_data: List[Dict[str, Any]], timings: Optional[Timings] = None
+) -> List[Dict[str, Any]]:
+    if not extracted_data:
+        return []
+    with timed("recommendation", timings):
+        if options.recommend_mode == "local":
+            return _recommend_locally(resume, extracted_data)
+        if options.recommend_mode == "map_reduce":
+            return _recommend_map_reduce(resume, extracted_data, not options.bypass_llm_cache)
+        return _recommend_jobs(resume, extracted_data, options.candidates, not options.bypass_llm_cache)
+
+
+def _page_url(url: str, page: int) -> str:
+    if page == 1:
+        return url
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != LISTING_PAGE_PARAM]
+    query.append((LISTING_PAGE_PARAM, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _listing_page(
+    jobs_page_url: str, page: int, options: CrawlOptions, timings: Optional[Timings]
+) -> List[Tuple[str, str]]:
+    """Return (apply link, listing fingerprint) pairs for one results page.
+
+    Fingerprints are only computed when the job store is enabled. Only the first page may fall
+    back to the LLM: a later page without recognisable job links is taken as past the last page.
+    """
+    page_url = _page_url(jobs_page_url, page)
+    with timed("listing_scrape", timings):
+        markdown = _scrape_markdown(page_url)
+    with timed("link_extraction", timings):
+        links = _extract_apply_links(
+            markdown, options.max_jobs, page_url, not options.bypass_llm_cache, allow_llm=page == 1
+        )
+    snippets = listing_snippets(markdown, page_url) if job_store is not None else {}
+    return [(link, listing_hash(snippets.get(link, ""))) for link in links]
+
+
+def iter_crawl(options: CrawlOptions, timings: Optional[Timings], flow_id: str) -> Iterator[Tuple[str, Any]]:
+    """Crawl listing pages and job details concurrently until the request deadline.
+
+    Yields ("links", [link, ...]) as each listing page is released in page order, and
+    ("details", (index, details)) as detail records become available, where index is the link's
+    position across all pages. Each page's links go to the detail pool as soon as the page is
+    released. Fresh job store rows are yielded without scraping. A failure on the first page, or
+    the deadline passing before it is scraped, raises; later pages that fail are skipped. The
+    first released page with no new links ends pagination, so trailing empty pages are never
+    crawled further.
+    """
+    deadline = time.monotonic() + options.deadline_seconds
+    jobs_page_url = options.jobs_page_url or DEFAULT_JOBS_URL
+    links: List[str] = []
+    seen = set()
+    finished_pages: Dict[int, Optional[List[Tuple[str, str]]]] = {}
+    exhausted = False
+    next_page = 1
+    fallback_rows: Dict[int, Any] = {}
+
+    page_pool = ThreadPoolExecutor(max_workers=min(options.max_pages, LISTING_PAGE_CONCURRENCY))
+    detail_pool = ThreadPoolExecutor(max_workers=options.concurrency)
+    try:
+        page_futures: Dict[Future, int] = {
+            page_pool.submit(run_in_flow, flow_id, _listing_page, jobs_page_url, page, options, timings): page
+            for page in range(1, options.max_pages + 1)
+        }
+        detail_futures: Dict[Future, Tuple[int, str, str]] = {}
+        while page_futures or detail_futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if next_page == 1:
+                    raise PipelineError(status_code=504, detail="Listing page was not scraped before the deadline")
+                break
+            done, _ = wait([*page_futures, *detail_futures], timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in page_futures:
+                    page = page_futures.pop(future)
+                    try:
+                        finished_pages[page] = future.result()
+                    except Exception:
+                        if page == 1:
+                            raise
+                        finished_pages[page] = None
+                    continue
+                index, link, fingerprint = detail_futures.pop(future)
+                details = future.result()
+                if details:
+                    fallback_rows.pop(index, None)
+                    if job_store is not None:
+                        job_store.upsert(link, details, fingerprint)
+                    yield "details", (index, details)
+                elif index in fallback_rows:
+                    yield "details", (index, JobStore.details(fallback_rows.pop(index)))
+
+            while not exhausted and next_page in finished_pages:
+                page_entries = finished_pages.pop(next_page)
+                next_page += 1
+                if page_entries is None:
+                    continue
+                entries = [entry for entry in page_entries if entry[0] not in seen]
+                entries = entries[: options.max_jobs - len(links)]
+                if not entries:
+                    exhausted = True
+                    break
+                first_index = len(links)
+                links.extend(link for link, _ in entries)
+                seen.update(link for link, _ in entries)
+                yield "links", [link for link, _ in entries]
+
+                rows = job_store.get_many([link for link, _ in entries]) if job_store is not None else {}
+                fresh: List[str] = []
+                for offset, (link, fingerprint) in enumerate(entries):
+                    index = first_index + offset
+                    row = rows.get(link)
+                    state = "new"
+                    if job_store is not None:
+                        if row is None:
+                            state = "new"
+                        elif options.refresh or job_store.needs_scrape(row, fingerprint):
+                            state = "stale"
+                        else:
+                            state = "fresh"
+                        JOB_STORE_LOOKUPS.labels(state).inc()
+                        if state == "fresh":
+                            fresh.append(link)
+                            yield "details", (index, JobStore.details(row))
+                            continue
+                        if row is not None:
+                            fallback_rows[index] = row
+                    # A stale or refreshed job must reach Firecrawl: the detail cache holds the old extract.
+                    use_cache = state == "new" and not options.refresh
+                    future = detail_pool.submit(run_in_flow, flow_id, _timed_job_details, link, timings, use_cache)
+                    detail_futures[future] = (index, link, fingerprint)
+                if job_store is not None:
+                    job_store.touch(fresh)
+
+            if exhausted or len(links) >= options.max_jobs:
+                for future in page_futures:
+                    future.cancel()
+                page_futures.clear()
+
+        for index, row in fallback_rows.items():
+            yield "details", (index, JobStore.details(row))
+    finally:
+        page_pool.shutdown(wait=False, cancel_futures=True)
+        detail_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def crawl(options: CrawlOptions, timings: Optional[Timings]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    links: List[str] = []
+    completed: List[Tuple[int, Dict[str, Any]]] = []
+    for kind, payload in iter_crawl(options, timings, current_flow.get()):
+        if kind == "links":
+            links.extend(payload)
+        else:
+            completed.append(payload)
+    return links, [details for _, details in sorted(completed, key=lambda item: item[0])]
+
+
+def _recommend_one(
+    resume_index: int,
+    resume: str,
+    options: CrawlOptions,
+    extracted_data: List[Dict[str, Any]],
+    timings: Optional[Timings],
+) -> Dict[str, Any]:
+    try:
+        recommended_jobs = recommend(resume, options, extracted_data, timings)
+    except Exception as exc:
+        error = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+        return {"resume_index": resume_index, "recommended_jobs": [], "error": error}
+    return {"resume_index": resume_index, "recommended_jobs": recommended_jobs, "error": None}
+
+
+def recommend_many(
+    resumes: List[str],
+    options: CrawlOptions,
+    extracted_data: List[Dict[str, Any]],
+    timings: Optional[Timings] = None,
+) -> List[Dict[str, Any]]:
+    """Recommend for each resume against one crawl; a failing resume only gets an error entry."""
+    flow_id = current_flow.get()
+    with ThreadPoolExecutor(max_workers=min(BATCH_RECOMMEND_CONCURRENCY, len(resumes))) as executor:
+        return list(
+            executor.map(
+                lambda item: run_in_flow(flow_id, _recommend_one, item[0], item[1], options, extracted_data, timings),
+                enumerate(resumes),
+            )
+        )
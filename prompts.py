@@ -0,0 +1,95 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+PROMPT_JOB_FIELDS = (
+    "job_title",
+    "sub_division_of_organization",
+    "location",
+    "compensation",
+    "key_skills",
+    "apply_link",
+)
+
+_LINK_LINE = re.compile(r"\]\(|https?://")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+
+_encoding = None
+_encoding_unavailable = tiktoken is None
+
+
+def _get_encoding():
+    """The o200k_base encoding, or None when tiktoken is missing or cannot load it (e.g. offline)."""
+    global _encoding, _encoding_unavailable
+    if _encoding is None and not _encoding_unavailable:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding_unavailable = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when it is available, otherwise assume ~4 characters per token."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def compact_text(text: str) -> str:
+    """Collapse runs of spaces and drop blank lines."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def link_lines(markdown: str) -> str:
+    """Keep only the markdown lines that carry a link, minus any images on them."""
+    lines = (compact_text(_IMAGE.sub("", line)) for line in markdown.splitlines())
+    return "\n".join(line for line in lines if line and _LINK_LINE.search(line))
+
+
+def compact_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields a model needs to judge fit, without empty values or duplicate skills."""
+    compact: Dict[str, Any] = {}
+    for field in PROMPT_JOB_FIELDS:
+        value = job.get(field)
+        if field == "key_skills" and isinstance(value, list):
+            value = list(dict.fromkeys(str(skill).strip() for skill in value if str(skill).strip()))
+        elif isinstance(value, str):
+            value = " ".join(value.split())
+        if value:
+            compact[field] = value
+    return compact
+
+
+def compact_jobs(jobs: Iterable[Dict[str, Any]], max_tokens: int) -> str:
+    """One compact JSON object per line, in the given order, stopping before the token budget is exceeded."""
+    lines: List[str] = []
+    used = 0
+    for job in jobs:
+        line = json.dumps(compact_job(job), separators=(",", ":"), ensure_ascii=False)
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+
+RANKED_FIELDS = {"job_title": 3.0, "key_skills": 2.0, "sub_division_of_organization": 1.0}
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our that the their this to with you your "
+    "we will who has have".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _job_terms(job: Dict[str, Any]) -> Counter:
+    terms: Counter = Counter()
+    for field, weight in RANKED_FIELDS.items():
+        value = job.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value)
+        if not isinstance(value, str):
+            continue
+        for token in tokenize(value):
+            terms[token] += weight
+    return terms
+
+
+def bm25_scores(resume: str, jobs: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """Score each job against the resume, treating the resume as the query and jobs as documents."""
+    docs = [_job_terms(job) for job in jobs]
+    if not docs:
+        return []
+    query = Counter(tokenize(resume))
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = (sum(lengths) / len(lengths)) or 1.0
+    doc_freq: Counter = Counter(term for doc in docs for term in doc)
+
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term, query_count in query.items():
+            tf = doc.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += query_count * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def rank_jobs(resume: str, jobs: List[Dict[str, Any]], top_k: int) -> List[Tuple[float, Dict[str, Any]]]:
+    """Return the top_k (score, job) pairs, best first; ties keep the scrape order."""
+    scored = list(zip(bm25_scores(resume, jobs), jobs))
+    order = sorted(range(len(scored)), key=lambda i: -scored[i][0])
+    return [scored[i] for i in order[:top_k]]
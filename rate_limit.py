@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+from metrics import UPSTREAM_RATE, UPSTREAM_RATE_LIMITED, UPSTREAM_WAIT_SECONDS
+
+
+current_flow: ContextVar[str] = ContextVar("current_flow", default="default")
+
+_flow_weights: Dict[str, float] = {}
+_flow_weights_lock = threading.Lock()
+
+
+def flow_weight(flow_id: str) -> float:
+    with _flow_weights_lock:
+        return _flow_weights.get(flow_id, 1.0)
+
+
+class SchedulerTimeout(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # Callers may read the clock before the bucket was created; never refill backwards.
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class UpstreamScheduler:
+    """Token-bucket admission for one upstream API.
+
+    Callers queue per flow (one flow per /apply request) and flows are served weighted round-robin:
+    a flow at the head of the rotation gets up to its weight (see `weighted`) in grants before
+    yielding its turn, so a single large request cannot starve the others. The request rate halves on every 429 and
+    creeps back to the configured rate on success. An optional second bucket enforces a
+    tokens-per-minute budget using estimated prompt sizes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        max_concurrency: int,
+        tokens_per_minute: float = 0,
+        max_wait: float = 120,
+    ) -> None:
+        self.name = name
+        self.max_rate = rate
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.requests = TokenBucket(rate, burst)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute > 0 else None
+        self.paused_until = 0.0
+        self.active = 0
+        self._queues: "OrderedDict[str, Deque[object]]" = OrderedDict()
+        self._credits: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        UPSTREAM_RATE.labels(name).set(rate)
+
+    def _wait_time(self, flow: str, ticket: object, tokens: int) -> Optional[float]:
+        head_flow = next(iter(self._queues))
+        if head_flow != flow or self._queues[flow][0] is not ticket or self.active >= self.max_concurrency:
+            return None
+        now = time.monotonic()
+        wait = max(self.paused_until - now, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(wait, 0.0)
+
+    def _dequeue(self, flow: str, ticket: object, granted: bool) -> None:
+        queue = self._queues[flow]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[flow]
+            del self._credits[flow]
+        elif granted:
+            self._credits[flow] -= 1
+            if self._credits[flow] < 1:
+                self._credits[flow] += flow_weight(flow)
+                self._queues.move_to_end(flow)
+
+    def acquire(self, tokens: int = 0) -> None:
+        flow = current_flow.get()
+        ticket = object()
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        granted = False
+        with self._cond:
+            if flow not in self._queues:
+                self._queues[flow] = deque()
+                self._credits[flow] = flow_weight(flow)
+            self._queues[flow].append(ticket)
+            try:
+                while True:
+                    wait = self._wait_time(flow, ticket, tokens)
+                    if wait == 0:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SchedulerTimeout(f"{self.name} capacity not available within {self.max_wait}s")
+                    self._cond.wait(timeout=remaining if wait is None else min(wait, remaining))
+                self.requests.take(1)
+                if self.tokens is not None and tokens:
+                    self.tokens.take(tokens)
+                self.active += 1
+                granted = True
+            finally:
+                self._dequeue(flow, ticket, granted)
+                self._cond.notify_all()
+        UPSTREAM_WAIT_SECONDS.labels(self.name).observe(time.monotonic() - started)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now and no flow is waiting; never queues.
+
+        Meant for optional extra requests such as hedges, which must not compete with queued work.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if self._queues or self.active >= self.max_concurrency:
+                return False
+            if max(self.paused_until - now, self.requests.wait_time(1, now)) > 0:
+                return False
+            self.requests.take(1)
+            self.active += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int = 0) -> Iterator[None]:
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Charge (or refund) the token budget for the gap between estimated and reported usage."""
+        if self.tokens is None or not actual:
+            return
+        with self._cond:
+            self.tokens.take(actual - estimated)
+
+    def report(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            if status_code == 429:
+                UPSTREAM_RATE_LIMITED.labels(self.name).inc()
+                self.requests.rate = max(self.max_rate * 0.05, self.requests.rate / 2)
+                self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or 1.0))
+            elif status_code < 400 and self.requests.rate < self.max_rate:
+                self.requests.rate = min(self.max_rate, self.requests.rate + self.max_rate * 0.05)
+            else:
+                return
+            UPSTREAM_RATE.labels(self.name).set(self.requests.rate)
+            self._cond.notify_all()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@contextmanager
+def flow(flow_id: str) -> Iterator[None]:
+    token = current_flow.set(flow_id)
+    try:
+        yield
+    finally:
+        current_flow.reset(token)
+
+
+@contextmanager
+def weighted(flow_id: str, weight: float) -> Iterator[None]:
+    """Give `flow_id` `weight` (at least 1) grants per scheduling turn while the block runs.
+
+    Weights are looked up by flow id rather than carried in the context, so they also apply to
+    work the flow hands to other threads with run_in_flow.
+    """
+    with _flow_weights_lock:
+        _flow_weights[flow_id] = max(1.0, weight)
+    try:
+        yield
+    finally:
+        with _flow_weights_lock:
+            _flow_weights.pop(flow_id, None)
+
+
+def run_in_flow(flow_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+    with flow(flow_id):
+        return fn(*args)
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from contextvars import copy_context
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from metrics import CIRCUIT_REJECTIONS, CIRCUIT_STATE
+
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, then lets one trial call through per
+    `reset_timeout` seconds until a success closes it again."""
+
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name).set(0)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(self.STATES[state])
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state("half_open")
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        CIRCUIT_REJECTIONS.labels(self.name).inc()
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != "closed":
+                self._set_state("closed")
+
+    def record_ignored(self) -> None:
+        """End a call that failed before reaching the upstream, counting it as neither success nor failure."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call durations per kind."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(kind, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, kind: str, pct: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(kind, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than an upstream Retry-After (capped at `cap`)."""
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if retry_after:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+def hedged(
+    fn: Callable[[], Any],
+    hedge_after: Optional[float],
+    executor: Executor,
+    can_hedge: Optional[Callable[[], bool]] = None,
+) -> Tuple[Any, str]:
+    """Run fn; if it has not finished after `hedge_after` seconds, race a duplicate against it.
+
+    The clock starts at submission, so acquire any upstream capacity before calling. When the
+    delay passes, `can_hedge` (if given) decides whether a duplicate may be sent at all.
+    Returns (result, outcome) where outcome is "none", "primary" or "hedge". A call that raises
+    only loses the race if the other one succeeds.
+    """
+    if hedge_after is None:
+        return fn(), "none"
+    primary = executor.submit(copy_context().run, fn)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done or (can_hedge is not None and not can_hedge()):
+        return primary.result(), "none"
+    hedge = executor.submit(copy_context().run, fn)
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), "primary" if future is primary else "hedge"
+            error = future.exception()
+    assert error is not None
+    raise error
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from admission import QuotaExceeded, TenantLimiter
+
+
+def test_concurrency_limit_is_per_tenant():
+    limiter = TenantLimiter(max_concurrent=2, requests_per_minute=0)
+    limiter.acquire("a")
+    limiter.acquire("a")
+    with pytest.raises(QuotaExceeded) as exc:
+        limiter.acquire("a")
+    assert exc.value.retry_after_header() == "1"
+    limiter.acquire("b")
+    limiter.release("a")
+    limiter.acquire("a")
+
+
+def test_rate_limit_rejects_with_retry_hint():
+    limiter = TenantLimiter(max_concurrent=0, requests_per_minute=2)
+    for _ in range(2):
+        limiter.acquire("a")
+        limiter.release("a")
+    with pytest.raises(QuotaExceeded) as exc:
+        limiter.acquire("a")
+    assert 0 < exc.value.retry_after <= 30
+    assert int(exc.value.retry_after_header()) >= 1
+    limiter.acquire("b")
+
+
+def test_rejected_request_holds_no_slot():
+    limiter = TenantLimiter(max_concurrent=1, requests_per_minute=1)
+    limiter.acquire("a")
+    limiter.release("a")
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire("a")
+    assert "a" not in limiter._active
+
+
+def test_zero_limits_disable_checks():
+    limiter = TenantLimiter(max_concurrent=0, requests_per_minute=0)
+    for _ in range(100):
+        limiter.acquire("a")
+    assert limiter._buckets == {}
+
+
+def test_idle_tenants_are_pruned():
+    limiter = TenantLimiter(max_concurrent=0, requests_per_minute=60, max_tenants=2)
+    limiter._buckets.clear()
+    for tenant in ("a", "b"):
+        limiter._bucket(tenant, time.monotonic())
+    limiter._bucket("c", time.monotonic())
+    assert set(limiter._buckets) == {"c"}
+
+
+def test_api_keys_map_to_priority_classes():
+    from app import _parse_api_keys
+
+    assert _parse_api_keys(" alpha, beta:batch ,,gamma:interactive") == {
+        "alpha": "interactive",
+        "beta": "batch",
+        "gamma": "interactive",
+    }
+    with pytest.raises(ValueError):
+        _parse_api_keys("alpha:urgent")
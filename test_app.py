@@ -0,0 +1,30 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from pipeline import PipelineError
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def unavailable(*args):
+        raise PipelineError(503, "Firecrawl circuit is open", {"Retry-After": "12"})
+
+    monkeypatch.setattr(app, "crawl", unavailable)
+    monkeypatch.setattr(app, "iter_crawl", unavailable)
+    return TestClient(app.app)
+
+
+def test_pipeline_errors_become_http_errors(client):
+    response = client.post("/apply", json={"resume": "designer"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "12"
+    assert response.json() == {"detail": "Firecrawl circuit is open"}
+
+
+def test_stream_reports_pipeline_errors_as_a_final_event(client):
+    response = client.post("/apply/stream", json={"resume": "designer"})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events == [{"event": "error", "status_code": 503, "detail": "Firecrawl circuit is open"}]
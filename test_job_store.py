@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+import pipeline
+from cache import TieredCache
+from job_store import JobStore
+from pipeline import CrawlOptions, crawl
+
+LISTING_URL = "https://www.google.com/about/careers/applications/jobs/results"
+
+
+def _job_link(number: int) -> str:
+    return f"{LISTING_URL}/{number}-designer"
+
+
+class FakeFirecrawl:
+    """Stands in for _firecrawl_post: serves a listing card per job and an extract per detail page."""
+
+    def __init__(self) -> None:
+        self.cards = {number: f"Designer {number}, Seattle" for number in (1, 2, 3)}
+        self.version = 1
+        self.detail_posts: List[str] = []
+
+    def __call__(self, kind: str, body: Dict[str, Any], timeout: float) -> httpx.Response:
+        if kind == "listing":
+            markdown = "\n".join(f"{card}\n[Apply]({_job_link(number)})" for number, card in self.cards.items())
+            return httpx.Response(200, json={"success": True, "data": {"markdown": markdown}})
+        self.detail_posts.append(body["url"])
+        extract = {"job_title": f"v{self.version} {body['url'][-10:]}", "apply_link": body["url"], "key_skills": []}
+        return httpx.Response(200, json={"success": True, "data": {"extract": extract}})
+
+
+@pytest.fixture
+def firecrawl(monkeypatch, tmp_path):
+    fake = FakeFirecrawl()
+    monkeypatch.setattr(pipeline, "_firecrawl_post", fake)
+    monkeypatch.setattr(pipeline, "scrape_cache", TieredCache(64))
+    monkeypatch.setattr(pipeline, "job_store", JobStore(str(tmp_path / "jobs.sqlite3"), refresh_after=3600))
+    monkeypatch.setattr(pipeline, "SCRAPE_CACHE_LISTING_TTL", 0)
+    return fake
+
+
+def _crawl(**options: Any) -> List[Dict[str, Any]]:
+    _, extracted_data = crawl(CrawlOptions(jobs_page_url=LISTING_URL, max_jobs=10, **options), None)
+    return extracted_data
+
+
+def test_new_jobs_are_scraped_and_fresh_jobs_come_from_the_store(firecrawl):
+    first = _crawl()
+    assert len(firecrawl.detail_posts) == 3
+    assert _crawl() == first
+    assert len(firecrawl.detail_posts) == 3
+
+
+def test_changed_card_rescrapes_past_the_detail_cache(firecrawl):
+    _crawl()
+    firecrawl.version = 2
+    firecrawl.cards[2] = "Senior Designer 2, Remote"
+    extracted = _crawl()
+    assert firecrawl.detail_posts[3:] == [_job_link(2)]
+    titles = sorted(job["job_title"] for job in extracted)
+    assert titles == sorted(["v1 1-designer", "v2 2-designer", "v1 3-designer"])
+
+
+def test_refresh_rescrapes_every_job(firecrawl):
+    _crawl()
+    firecrawl.version = 2
+    extracted = _crawl(refresh=True)
+    assert len(firecrawl.detail_posts) == 6
+    assert all(job["job_title"].startswith("v2 ") for job in extracted)
+    assert _crawl() == extracted
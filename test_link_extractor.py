@@ -0,0 +1,61 @@
+import pytest
+
+from link_extractor import compile_patterns, extract_links, listing_snippets, normalize_url
+
+BASE = "https://www.google.com/about/careers/applications/jobs/results"
+
+
+def _job(number: int) -> str:
+    return f"{BASE}/{number}-designer"
+
+
+@pytest.mark.parametrize(
+    ("url", "keep_query", "expected"),
+    [
+        ("HTTPS://WWW.Example.COM/jobs/", False, "https://www.example.com/jobs"),
+        ("https://example.com//jobs//42/#apply", False, "https://example.com/jobs/42"),
+        ("https://example.com:443/jobs?id=1", False, "https://example.com/jobs"),
+        ("http://example.com:8080/jobs", False, "http://example.com:8080/jobs"),
+        ("https://example.com/", False, "https://example.com/"),
+        ("https://example.com/jobs?b=2&utm_source=x&a=1&gclid=y", True, "https://example.com/jobs?a=1&b=2"),
+    ],
+)
+def test_normalize_url(url, keep_query, expected):
+    assert normalize_url(url, keep_query) == expected
+
+
+def test_extracts_matching_links_in_order_without_duplicates():
+    markdown = "\n".join(
+        [
+            f"[Designer]({_job(1)}?utm_source=feed)",
+            "[About us](https://www.google.com/about/)",
+            f"<{_job(2)}>",
+            f"[Designer again]({_job(1)})",
+            f'[Relative](/about/careers/applications/jobs/results/3-designer "title")',
+            "[Mail](mailto:jobs@google.com)",
+        ]
+    )
+    assert extract_links(markdown, "https://www.google.com/", 10) == [_job(1), _job(2), _job(3)]
+    assert extract_links(markdown, "https://www.google.com/", 2) == [_job(1), _job(2)]
+
+
+def test_image_wrapped_card_links_match_the_outer_link():
+    markdown = f"[![logo](https://cdn.example.com/logo.png)]({_job(555)})\n[![](/img.png) Designer]({_job(556)})"
+    assert extract_links(markdown, BASE, 10) == [_job(555), _job(556)]
+
+
+def test_no_pattern_match_returns_empty():
+    assert extract_links("[Careers](https://example.com/careers/1)", "https://example.com", 10) == []
+
+
+def test_custom_patterns_and_kept_query():
+    patterns = compile_patterns([{"host": "example.com", "path": r"^/careers/\d+$", "keep_query": True}])
+    markdown = "[A](https://jobs.example.com/careers/7?id=3&ref=feed) [B](https://example.com/blog/7)"
+    assert extract_links(markdown, "https://example.com", 10, patterns) == ["https://jobs.example.com/careers/7?id=3"]
+
+
+def test_listing_snippets_cover_each_card():
+    markdown = f"Designer, Seattle\n[Apply]({_job(1)})\nEngineer, Remote\n[Apply]({_job(2)})"
+    snippets = listing_snippets(markdown, BASE)
+    assert "Seattle" in snippets[_job(1)] and "Remote" not in snippets[_job(1)]
+    assert "Remote" in snippets[_job(2)]
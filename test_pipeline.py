@@ -0,0 +1,102 @@
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+import pipeline
+from cache import TieredCache
+from pipeline import CrawlOptions, PipelineError, Recommendations, crawl, recommend
+from rate_limit import UpstreamScheduler
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(pipeline, "scrape_cache", TieredCache(64))
+    monkeypatch.setattr(pipeline, "llm_cache", TieredCache(64))
+    monkeypatch.setattr(pipeline, "job_store", None)
+
+
+def _no_llm(*args: Any, **kwargs: Any) -> None:
+    raise AssertionError("the LLM must not be called")
+
+
+def test_deadline_before_first_listing_page_is_a_504(monkeypatch):
+    def slow_listing(kind: str, body: Dict[str, Any], timeout: float) -> httpx.Response:
+        time.sleep(1)
+        return httpx.Response(200, json={"success": True, "data": {"markdown": ""}})
+
+    monkeypatch.setattr(pipeline, "_firecrawl_post", slow_listing)
+    monkeypatch.setattr(pipeline, "_complete", _no_llm)
+    with pytest.raises(PipelineError) as exc:
+        crawl(CrawlOptions(jobs_page_url="https://example.com/jobs", deadline_seconds=0.1), None)
+    assert exc.value.status_code == 504
+
+
+@pytest.mark.parametrize("mode", ["llm", "local", "map_reduce"])
+def test_recommend_without_jobs_skips_the_llm(monkeypatch, mode):
+    monkeypatch.setattr(pipeline, "_complete", _no_llm)
+    assert recommend("resume", CrawlOptions(recommend_mode=mode), []) == []
+
+
+class FakeOpenAI:
+    """Chat client whose create() raises the queued errors before returning a reply."""
+
+    def __init__(self, errors: List[Exception]) -> None:
+        self.errors = errors
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs: Any) -> Any:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(content='{"apply_links": []}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def _rate_limited() -> Exception:
+    from openai import RateLimitError
+
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "0.01"}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.fixture
+def openai_limiter(monkeypatch):
+    limiter = UpstreamScheduler("test-openai", rate=100, burst=100, max_concurrency=4)
+    monkeypatch.setattr(pipeline, "openai_limiter", limiter)
+    return limiter
+
+
+def test_rate_limited_completion_is_retried_through_the_scheduler(monkeypatch, openai_limiter):
+    client = FakeOpenAI([_rate_limited()])
+    monkeypatch.setattr(pipeline, "_openai", client)
+    assert pipeline._create_completion([{"role": "user", "content": "hi"}]) == '{"apply_links": []}'
+    assert client.calls == 2
+    assert openai_limiter.requests.rate < 100
+
+
+def test_persistent_rate_limit_is_a_503(monkeypatch, openai_limiter):
+    client = FakeOpenAI([_rate_limited() for _ in range(pipeline.OPENAI_RETRY_ATTEMPTS)])
+    monkeypatch.setattr(pipeline, "_openai", client)
+    with pytest.raises(PipelineError) as exc:
+        pipeline._create_completion([{"role": "user", "content": "hi"}])
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+    assert client.calls == pipeline.OPENAI_RETRY_ATTEMPTS
+
+
+def _chunk_count(outcome: str) -> float:
+    return REGISTRY.get_sample_value("recommend_chunks_total", {"outcome": outcome}) or 0.0
+
+
+@pytest.mark.parametrize(("reply", "outcome"), [(None, "failed"), (Recommendations(recommended_jobs=[]), "ok")])
+def test_chunk_outcome_tells_invalid_output_from_no_picks(monkeypatch, reply, outcome):
+    monkeypatch.setattr(pipeline, "_complete", lambda prompt, model, use_cache: reply)
+    before = _chunk_count(outcome)
+    assert pipeline._recommend_chunk("resume", [{"job_title": "Designer", "apply_link": "https://a"}], True) == []
+    assert _chunk_count(outcome) == before + 1
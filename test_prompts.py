@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+import pytest
+
+import prompts
+
+
+@pytest.fixture
+def unloadable_tiktoken(monkeypatch):
+    calls = []
+
+    def get_encoding(name):
+        calls.append(name)
+        raise OSError("could not download o200k_base")
+
+    monkeypatch.setattr(prompts, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+    monkeypatch.setattr(prompts, "_encoding", None)
+    monkeypatch.setattr(prompts, "_encoding_unavailable", False)
+    return calls
+
+
+def test_encoding_load_failure_falls_back_to_estimate_once(unloadable_tiktoken):
+    assert prompts.count_tokens("x" * 40) == 11
+    assert prompts.truncate_tokens("x" * 40, 2) == "x" * 8
+    assert prompts.count_tokens("y") == 1
+    assert unloadable_tiktoken == ["o200k_base"]
+
+
+def test_compact_jobs_keeps_order_and_budget():
+    jobs = [{"job_title": f"Role {n}", "key_skills": ["ux", " ux ", ""], "location": ""} for n in range(50)]
+    lines = prompts.compact_jobs(jobs, 40).splitlines()
+    assert 0 < len(lines) < 50
+    assert lines[0] == '{"job_title":"Role 0","key_skills":["ux"]}'
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from typing import List
+
+import pytest
+
+from rate_limit import SchedulerTimeout, TokenBucket, UpstreamScheduler, flow, flow_weight, weighted
+
+
+def _queued(scheduler: UpstreamScheduler) -> int:
+    with scheduler._cond:
+        return sum(len(queue) for queue in scheduler._queues.values())
+
+
+def _grant_order(scheduler: UpstreamScheduler, flows: List[str]) -> str:
+    """Queue one call per entry of `flows` (in that order) behind a held slot, then record who is served."""
+    order: List[str] = []
+
+    def call(flow_id: str) -> None:
+        with flow(flow_id), scheduler.slot():
+            order.append(flow_id)
+
+    scheduler.acquire()
+    threads = []
+    for flow_id in flows:
+        thread = threading.Thread(target=call, args=(flow_id,))
+        thread.start()
+        threads.append(thread)
+        while _queued(scheduler) < len(threads):
+            time.sleep(0.001)
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    return "".join(order)
+
+
+def test_token_bucket_wait_time_and_take():
+    bucket = TokenBucket(rate=2, capacity=4)
+    now = bucket.updated
+    assert bucket.wait_time(4, now) == 0
+    bucket.take(4)
+    assert bucket.wait_time(1, now) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now + 0.5) == 0
+
+
+def test_flows_are_served_round_robin():
+    scheduler = UpstreamScheduler("test-rr", rate=1000, burst=1000, max_concurrency=1)
+    assert _grant_order(scheduler, ["A", "A", "A", "B", "B", "B"]) == "ABABAB"
+
+
+def test_weighted_flow_gets_weight_grants_per_turn():
+    scheduler = UpstreamScheduler("test-weighted", rate=1000, burst=1000, max_concurrency=1)
+    with weighted("I", 3):
+        order = _grant_order(scheduler, ["B"] * 4 + ["I"] * 6)
+    assert order == "BIIIBIIIBB"
+    assert flow_weight("I") == 1.0
+
+
+def test_try_acquire_never_jumps_the_queue():
+    scheduler = UpstreamScheduler("test-spare", rate=1000, burst=1000, max_concurrency=2)
+    assert scheduler.try_acquire()
+    assert scheduler.try_acquire()
+    assert not scheduler.try_acquire()
+    scheduler.release()
+    with scheduler._cond:
+        scheduler._queues["waiting"] = deque([object()])
+    assert not scheduler.try_acquire()
+
+
+def test_acquire_times_out_when_no_capacity():
+    scheduler = UpstreamScheduler("test-timeout", rate=1000, burst=1000, max_concurrency=1, max_wait=0.05)
+    scheduler.acquire()
+    with pytest.raises(SchedulerTimeout):
+        scheduler.acquire()
+    assert _queued(scheduler) == 0
+
+
+def test_429_halves_rate_and_pauses_then_recovers():
+    scheduler = UpstreamScheduler("test-429", rate=10, burst=10, max_concurrency=4)
+    scheduler.report(429, retry_after=30)
+    assert scheduler.requests.rate == 5
+    assert scheduler.paused_until - time.monotonic() > 29
+    scheduler.report(429)
+    assert scheduler.requests.rate == 2.5
+    scheduler.report(200)
+    assert scheduler.requests.rate == pytest.approx(3)
+    for _ in range(100):
+        scheduler.report(200)
+    assert scheduler.requests.rate == 10
+
+
+def test_paused_scheduler_does_not_grant():
+    scheduler = UpstreamScheduler("test-pause", rate=1000, burst=1000, max_concurrency=4, max_wait=0.05)
+    scheduler.report(429, retry_after=5)
+    with pytest.raises(SchedulerTimeout):
+        scheduler.acquire()
+
+
+def test_settle_charges_and_refunds_token_budget():
+    scheduler = UpstreamScheduler("test-tpm", rate=1000, burst=1000, max_concurrency=4, tokens_per_minute=6000)
+    with scheduler.slot(1000):
+        pass
+    assert scheduler.tokens.tokens == pytest.approx(5000, abs=1)
+    scheduler.settle(estimated=1000, actual=3000)
+    assert scheduler.tokens.tokens == pytest.approx(3000, abs=1)
+    scheduler.settle(estimated=1000, actual=200)
+    assert scheduler.tokens.tokens == pytest.approx(3800, abs=1)
+    scheduler.settle(estimated=1000, actual=0)
+    assert scheduler.tokens.tokens == pytest.approx(3800, abs=1)
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, backoff_delay, hedged
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test-open", failure_threshold=2, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_one_trial_and_closes_on_success():
+    breaker = CircuitBreaker("test-trial", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("test-reopen", failure_threshold=5, reset_timeout=0.05)
+    breaker.state, breaker.opened_at = "open", time.monotonic() - 1
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_ignored_trial_frees_the_slot_without_changing_state():
+    breaker = CircuitBreaker("test-ignored", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_ignored()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def test_backoff_respects_cap_and_retry_after():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, 0.5, 4) <= 4
+    assert backoff_delay(0, 0.5, 4, retry_after=3) >= 3
+    assert backoff_delay(0, 0.5, 4, retry_after=30) == 4
+
+
+def test_hedged_without_delay_calls_once_inline(executor):
+    calls = []
+    assert hedged(lambda: calls.append(threading.current_thread()) or "ok", None, executor) == ("ok", "none")
+    assert calls == [threading.current_thread()]
+
+
+def test_fast_call_is_not_hedged(executor):
+    calls = []
+    result = hedged(lambda: calls.append(1) or "ok", 1.0, executor)
+    assert result == ("ok", "none")
+    assert len(calls) == 1
+
+
+def test_slow_primary_loses_to_hedge(executor):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "primary"
+        return "hedge"
+
+    assert hedged(call, 0.05, executor) == ("hedge", "hedge")
+    assert len(calls) == 2
+
+
+def test_hedge_is_skipped_when_not_allowed(executor):
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.1)
+        return "primary"
+
+    assert hedged(call, 0.01, executor, can_hedge=lambda: False) == ("primary", "none")
+    assert len(calls) == 1
+
+
+def test_failure_only_raises_when_both_calls_fail(executor):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.1)
+            raise ValueError("primary failed")
+        time.sleep(0.2)
+        return "hedge"
+
+    assert hedged(flaky, 0.05, executor) == ("hedge", "hedge")
+
+    def broken():
+        time.sleep(0.1)
+        raise ValueError("down")
+
+    with pytest.raises(ValueError):
+        hedged(broken, 0.05, executor)
@@ -0,0 +1,96 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+import pipeline
+from cache import TieredCache
+from pipeline import ApplyLinks, Recommendations
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Replace the OpenAI call with queued replies, recording each request's messages and format."""
+    replies: List[str] = []
+    requests: List[Dict[str, Any]] = []
+
+    def fake_completion(messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None) -> str:
+        requests.append({"messages": messages, "response_format": response_format})
+        return replies.pop(0)
+
+    monkeypatch.setattr(pipeline, "_create_completion", fake_completion)
+    monkeypatch.setattr(pipeline, "llm_cache", TieredCache(16))
+    return replies, requests
+
+
+def _objects(schema: Any) -> List[Dict[str, Any]]:
+    if isinstance(schema, list):
+        return [found for item in schema for found in _objects(item)]
+    if not isinstance(schema, dict):
+        return []
+    found = [schema] if schema.get("type") == "object" else []
+    return found + [nested for value in schema.values() for nested in _objects(value)]
+
+
+def test_strict_schema_closes_every_object():
+    schema = pipeline._strict_schema(Recommendations.model_json_schema())
+    objects = _objects(schema)
+    assert len(objects) == 2
+    for obj in objects:
+        assert obj["additionalProperties"] is False
+        assert sorted(obj["required"]) == sorted(obj["properties"])
+
+
+def test_response_format_is_strict_json_schema(monkeypatch):
+    monkeypatch.setattr(pipeline, "LLM_STRUCTURED_OUTPUT", True)
+    response_format = pipeline._response_format(ApplyLinks)
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "ApplyLinks"
+    assert response_format["json_schema"]["strict"] is True
+    monkeypatch.setattr(pipeline, "LLM_STRUCTURED_OUTPUT", False)
+    assert pipeline._response_format(ApplyLinks) is None
+
+
+def test_invalid_list_items_are_dropped():
+    result = Recommendations.model_validate(
+        {"recommended_jobs": [{"job_title": "Designer", "compensation": "", "apply_link": "https://a"}, {"job": 1}]}
+    )
+    assert [job.job_title for job in result.recommended_jobs] == ["Designer"]
+
+
+def test_valid_output_needs_one_call(completions):
+    replies, requests = completions
+    replies.append(json.dumps({"apply_links": ["https://a", "https://b"]}))
+    result = pipeline._complete("find links", ApplyLinks, use_cache=False)
+    assert result.apply_links == ["https://a", "https://b"]
+    assert len(requests) == 1
+
+
+def test_invalid_output_is_repaired_once(completions):
+    replies, requests = completions
+    replies.extend(["not json at all", '{"apply_links": ["https://a"]}'])
+    result = pipeline._complete("find links", ApplyLinks, use_cache=False)
+    assert result.apply_links == ["https://a"]
+    assert len(requests) == 2
+    repair = requests[1]["messages"][0]["content"]
+    assert "not json at all" in repair
+    assert "find links" not in repair
+    assert requests[1]["response_format"] == requests[0]["response_format"]
+
+
+def test_failed_repair_gives_up_and_is_not_cached(completions):
+    replies, requests = completions
+    replies.extend(["nope", "still nope"])
+    assert pipeline._complete("find links", ApplyLinks, use_cache=False) is None
+    assert len(requests) == 2
+    replies.append('{"apply_links": []}')
+    assert pipeline._complete("find links", ApplyLinks).apply_links == []
+    assert len(requests) == 3
+
+
+def test_valid_result_is_served_from_cache(completions):
+    replies, requests = completions
+    replies.append('{"apply_links": ["https://a"]}')
+    pipeline._complete("find links", ApplyLinks)
+    assert pipeline._complete("find links", ApplyLinks).apply_links == ["https://a"]
+    assert len(requests) == 1
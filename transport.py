@@ -0,0 +1,76 @@
+import os
+from typing import TYPE_CHECKING, Dict, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", "0"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "30"))
+HTTP_ENABLE_HTTP2 = os.getenv("HTTP_ENABLE_HTTP2", "1") != "0"
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+# Retries (429s above all) belong to the upstream scheduler in pipeline.py, not the SDK.
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+
+
+def _http2_available() -> bool:
+    if not HTTP_ENABLE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _limits(pool_size: int) -> httpx.Limits:
+    keepalive = HTTP_KEEPALIVE_CONNECTIONS or pool_size
+    return httpx.Limits(
+        max_connections=max(HTTP_MAX_CONNECTIONS, keepalive),
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout(read_timeout: float) -> httpx.Timeout:
+    return httpx.Timeout(read_timeout, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT)
+
+
+def create_http_client(
+    pool_size: int,
+    timeout: float = 60,
+    base_url: str = "",
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Client:
+    """Build a keep-alive HTTP client whose idle pool holds `pool_size` connections."""
+    return httpx.Client(
+        base_url=base_url,
+        headers=headers,
+        limits=_limits(pool_size),
+        timeout=_timeout(timeout),
+        http2=_http2_available(),
+    )
+
+
+def create_openai_client(api_key: str, pool_size: int, base_url: Optional[str] = None) -> "OpenAI":
+    """Build an OpenAI client backed by a tuned, shared connection pool."""
+    from openai import OpenAI
+
+    http_client = httpx.Client(
+        limits=_limits(pool_size),
+        timeout=_timeout(OPENAI_TIMEOUT),
+        http2=_http2_available(),
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client,
+        timeout=_timeout(OPENAI_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES,
+    )